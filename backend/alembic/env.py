@@ -8,11 +8,13 @@ from alembic import context
 
 # Import your models here
 from backend.core.db import Base
-from backend.models.user import User
+from backend.models.user import User, RefreshToken
 from backend.models.institute import Institute
 from backend.models.course import Course, Subject
 from backend.models.exam import Exam, ExamAttempt
 from backend.models.certificate import CourseCertificate
+from backend.models.progress import CandidateSubjectProgress, CandidateCourseProgress
+from backend.models.analytics import AnalyticsCounter, ExamItemAnalysis, ExamItemStats, ExamStats, InstituteDailyStats
 from backend.core.config import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,41 @@
+"""Add exam_questions table
+
+Revision ID: 83f5431b529d
+Revises: 264e1360047b
+Create Date: 2026-10-17 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '83f5431b529d'
+down_revision: Union[str, None] = '264e1360047b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('exam_questions',
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('question', sa.String(), nullable=False),
+    sa.Column('option_a', sa.String(), nullable=False),
+    sa.Column('option_b', sa.String(), nullable=False),
+    sa.Column('option_c', sa.String(), nullable=False),
+    sa.Column('option_d', sa.String(), nullable=False),
+    sa.Column('correct_answer', sa.String(length=1), nullable=False),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('exam_id', 'position')
+    )
+    op.add_column('exams', sa.Column('question_count', sa.Integer(), nullable=True))
+    op.add_column('exams', sa.Column('questions_updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('exams', 'questions_updated_at')
+    op.drop_column('exams', 'question_count')
+    op.drop_table('exam_questions')
@@ -0,0 +1,26 @@
+"""Add csv_sha256 to exams
+
+Revision ID: 512a0e3c7225
+Revises: 83f5431b529d
+Create Date: 2026-10-17 09:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '512a0e3c7225'
+down_revision: Union[str, None] = '83f5431b529d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('exams', sa.Column('csv_sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('exams', 'csv_sha256')
@@ -0,0 +1,67 @@
+"""Add candidate progress tables and courses.subject_count
+
+Revision ID: c4e8a1d93f27
+Revises: 512a0e3c7225
+Create Date: 2026-10-17 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1d93f27'
+down_revision: Union[str, None] = '512a0e3c7225'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('courses', sa.Column('subject_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('candidate_subject_progress',
+    sa.Column('candidate_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('subject_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('course_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('passed_on', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['candidate_id'], ['candidates.user_id'], ),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('candidate_id', 'subject_id')
+    )
+    op.create_index(op.f('ix_candidate_subject_progress_course_id'), 'candidate_subject_progress', ['course_id'], unique=False)
+    op.create_table('candidate_course_progress',
+    sa.Column('candidate_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('course_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('passed_subjects', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['candidate_id'], ['candidates.user_id'], ),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('candidate_id', 'course_id')
+    )
+
+    # Backfill from existing data (same as `python -m backend.scripts.rebuild_progress`)
+    op.execute(
+        "UPDATE courses SET subject_count = "
+        "(SELECT count(*) FROM subjects WHERE subjects.course_id = courses.id)"
+    )
+    op.execute(
+        "INSERT INTO candidate_subject_progress (candidate_id, subject_id, course_id, passed_on) "
+        "SELECT a.candidate_id, e.subject_id, s.course_id, min(a.attempted_on) "
+        "FROM exam_attempts a JOIN exams e ON e.id = a.exam_id JOIN subjects s ON s.id = e.subject_id "
+        "WHERE a.passed GROUP BY a.candidate_id, e.subject_id, s.course_id"
+    )
+    op.execute(
+        "INSERT INTO candidate_course_progress (candidate_id, course_id, passed_subjects) "
+        "SELECT candidate_id, course_id, count(*) FROM candidate_subject_progress "
+        "WHERE course_id IS NOT NULL GROUP BY candidate_id, course_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('candidate_course_progress')
+    op.drop_index(op.f('ix_candidate_subject_progress_course_id'), table_name='candidate_subject_progress')
+    op.drop_table('candidate_subject_progress')
+    op.drop_column('courses', 'subject_count')
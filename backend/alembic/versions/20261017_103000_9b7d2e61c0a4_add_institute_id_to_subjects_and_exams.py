@@ -0,0 +1,47 @@
+"""Add denormalized institute_id to subjects and exams
+
+Revision ID: 9b7d2e61c0a4
+Revises: c4e8a1d93f27
+Create Date: 2026-10-17 10:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b7d2e61c0a4'
+down_revision: Union[str, None] = 'c4e8a1d93f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('subjects', sa.Column('institute_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_index(op.f('ix_subjects_institute_id'), 'subjects', ['institute_id'], unique=False)
+    op.create_foreign_key('subjects_institute_id_fkey', 'subjects', 'institutes', ['institute_id'], ['id'])
+    op.add_column('exams', sa.Column('institute_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_index(op.f('ix_exams_institute_id'), 'exams', ['institute_id'], unique=False)
+    op.create_foreign_key('exams_institute_id_fkey', 'exams', 'institutes', ['institute_id'], ['id'])
+
+    # Backfill from the subject's trainer
+    op.execute(
+        "UPDATE subjects SET institute_id = "
+        "(SELECT trainers.institute_id FROM trainers WHERE trainers.user_id = subjects.trainer_id)"
+    )
+    op.execute(
+        "UPDATE exams SET institute_id = "
+        "(SELECT subjects.institute_id FROM subjects WHERE subjects.id = exams.subject_id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('exams_institute_id_fkey', 'exams', type_='foreignkey')
+    op.drop_index(op.f('ix_exams_institute_id'), table_name='exams')
+    op.drop_column('exams', 'institute_id')
+    op.drop_constraint('subjects_institute_id_fkey', 'subjects', type_='foreignkey')
+    op.drop_index(op.f('ix_subjects_institute_id'), table_name='subjects')
+    op.drop_column('subjects', 'institute_id')
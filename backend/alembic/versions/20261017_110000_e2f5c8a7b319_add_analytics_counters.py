@@ -0,0 +1,55 @@
+"""Add analytics_counters
+
+Revision ID: e2f5c8a7b319
+Revises: 9b7d2e61c0a4
+Create Date: 2026-10-17 11:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f5c8a7b319'
+down_revision: Union[str, None] = '9b7d2e61c0a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('analytics_counters',
+    sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('total_candidates', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('total_trainers', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('total_institutes', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('total_courses', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('total_certificates', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('total_attempts', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('passed_attempts', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('score_sum', sa.Float(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('shard')
+    )
+
+    # Seed the baseline from the existing rows (same as `python -m backend.scripts.reconcile_analytics`)
+    op.execute(
+        "INSERT INTO analytics_counters (shard, total_candidates, total_trainers, total_institutes, "
+        "total_courses, total_certificates, total_attempts, passed_attempts, score_sum, reconciled_at) "
+        "SELECT 0, "
+        "(SELECT count(*) FROM candidates), "
+        "(SELECT count(*) FROM trainers), "
+        "(SELECT count(*) FROM institutes), "
+        "(SELECT count(*) FROM courses), "
+        "(SELECT count(*) FROM course_certificates), "
+        "(SELECT count(*) FROM exam_attempts), "
+        "(SELECT count(*) FROM exam_attempts WHERE passed), "
+        "(SELECT coalesce(sum(score_percentage), 0) FROM exam_attempts), "
+        "now()"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_counters')
@@ -0,0 +1,40 @@
+"""Add institute_daily_stats
+
+Revision ID: 5f1a9c3e8d42
+Revises: e2f5c8a7b319
+Create Date: 2026-10-17 11:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1a9c3e8d42'
+down_revision: Union[str, None] = 'e2f5c8a7b319'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('institute_daily_stats',
+    sa.Column('institute_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('attempts', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('passed_attempts', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('score_sum', sa.Float(), server_default='0', nullable=False),
+    sa.Column('certificates', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['institute_id'], ['institutes.id'], ),
+    sa.PrimaryKeyConstraint('institute_id', 'day')
+    )
+    op.create_index(op.f('ix_institute_daily_stats_day'), 'institute_daily_stats', ['day'], unique=False)
+    # Existing history is loaded with `python -m backend.scripts.refresh_daily_stats`
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_institute_daily_stats_day'), table_name='institute_daily_stats')
+    op.drop_table('institute_daily_stats')
@@ -0,0 +1,26 @@
+"""Add (institute_id, user_id) index on candidates
+
+Revision ID: 7a3d5b9e1f60
+Revises: 5f1a9c3e8d42
+Create Date: 2026-10-17 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3d5b9e1f60'
+down_revision: Union[str, None] = '5f1a9c3e8d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_candidates_institute_id_user_id', 'candidates', ['institute_id', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_candidates_institute_id_user_id', table_name='candidates')
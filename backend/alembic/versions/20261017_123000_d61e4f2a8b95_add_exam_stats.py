@@ -0,0 +1,63 @@
+"""Add exam_stats and the (exam_id, id) index on exam_attempts
+
+Revision ID: d61e4f2a8b95
+Revises: 7a3d5b9e1f60
+Create Date: 2026-10-17 12:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd61e4f2a8b95'
+down_revision: Union[str, None] = '7a3d5b9e1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCORE_BUCKETS = 10
+
+
+def upgrade() -> None:
+    op.create_table('exam_stats',
+    sa.Column('exam_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('attempts', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('passed_attempts', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('score_sum', sa.Float(), server_default='0', nullable=False),
+    *(
+        sa.Column(f'score_bucket_{bucket}', sa.BigInteger(), server_default='0', nullable=False)
+        for bucket in range(SCORE_BUCKETS)
+    ),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.PrimaryKeyConstraint('exam_id', 'shard')
+    )
+    op.create_index('ix_exam_attempts_exam_id_id', 'exam_attempts', ['exam_id', 'id'], unique=False)
+
+    # Seed each exam's stats from its existing attempts
+    buckets = ", ".join(
+        f"count(*) FILTER (WHERE {' AND '.join(conditions)})" if conditions else "count(*)"
+        for conditions in (
+            ([f"score_percentage >= {bucket * 10}"] if bucket > 0 else [])
+            + ([f"score_percentage < {(bucket + 1) * 10}"] if bucket < SCORE_BUCKETS - 1 else [])
+            for bucket in range(SCORE_BUCKETS)
+        )
+    )
+    op.execute(f"""
+        INSERT INTO exam_stats (
+            exam_id, shard, attempts, passed_attempts, score_sum,
+            {", ".join(f"score_bucket_{bucket}" for bucket in range(SCORE_BUCKETS))}
+        )
+        SELECT exam_id, 0, count(*), count(*) FILTER (WHERE passed), sum(score_percentage), {buckets}
+        FROM exam_attempts
+        GROUP BY exam_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_exam_attempts_exam_id_id', table_name='exam_attempts')
+    op.drop_table('exam_stats')
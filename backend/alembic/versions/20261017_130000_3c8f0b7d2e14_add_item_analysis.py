@@ -0,0 +1,56 @@
+"""Add exam_attempts.recorded_at and item analysis tables
+
+Revision ID: 3c8f0b7d2e14
+Revises: d61e4f2a8b95
+Create Date: 2026-10-17 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8f0b7d2e14'
+down_revision: Union[str, None] = 'd61e4f2a8b95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing attempts get the migration time, so the first refresh of each exam picks them all up
+    op.add_column('exam_attempts', sa.Column('recorded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.create_index('ix_exam_attempts_exam_id_recorded_at', 'exam_attempts', ['exam_id', 'recorded_at'], unique=False)
+    op.create_table('exam_item_analysis',
+    sa.Column('exam_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('exam_version', sa.String(), nullable=True),
+    sa.Column('attempts', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('total_score_sum', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('total_score_sq_sum', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('analyzed_through', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.PrimaryKeyConstraint('exam_id')
+    )
+    op.create_table('exam_item_stats',
+    sa.Column('exam_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('position', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('correct', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('option_a', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('option_b', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('option_c', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('option_d', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('unanswered', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('correct_total_sum', sa.BigInteger(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.PrimaryKeyConstraint('exam_id', 'position')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('exam_item_stats')
+    op.drop_table('exam_item_analysis')
+    op.drop_index('ix_exam_attempts_exam_id_recorded_at', table_name='exam_attempts')
+    op.drop_column('exam_attempts', 'recorded_at')
@@ -0,0 +1,26 @@
+"""Add users.tokens_valid_after
+
+Revision ID: 8a1d6f3e9c27
+Revises: 5e92a7c4b1d8
+Create Date: 2026-10-17 16:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a1d6f3e9c27'
+down_revision: Union[str, None] = '5e92a7c4b1d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('tokens_valid_after', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'tokens_valid_after')
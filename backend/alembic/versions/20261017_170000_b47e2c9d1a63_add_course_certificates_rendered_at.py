@@ -0,0 +1,29 @@
+"""Add course_certificates.rendered_at
+
+Revision ID: b47e2c9d1a63
+Revises: 8a1d6f3e9c27
+Create Date: 2026-10-17 17:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b47e2c9d1a63'
+down_revision: Union[str, None] = '8a1d6f3e9c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('course_certificates', sa.Column('rendered_at', sa.DateTime(timezone=True), nullable=True))
+    # Existing certificates are not queued on the next start; re-render them
+    # per institute from the admin API if their PDFs are missing
+    op.execute("UPDATE course_certificates SET rendered_at = COALESCE(issued_on, now())")
+
+
+def downgrade() -> None:
+    op.drop_column('course_certificates', 'rendered_at')
@@ -0,0 +1,25 @@
+"""Index refresh_tokens.expires_at
+
+Revision ID: 0f3b8d6a2e51
+Revises: b47e2c9d1a63
+Create Date: 2026-10-17 18:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f3b8d6a2e51'
+down_revision: Union[str, None] = 'b47e2c9d1a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_refresh_tokens_expires_at'), 'refresh_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_refresh_tokens_expires_at'), table_name='refresh_tokens')
@@ -16,11 +16,21 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "digital_literacy"
     SQLALCHEMY_DATABASE_URL: Optional[str] = None
+    # asyncio (asyncpg) URL for async routes; derived from SQLALCHEMY_DATABASE_URL if unset.
+    # One worker holds many requests' queries in flight, hence the larger pool
+    ASYNC_SQLALCHEMY_DATABASE_URL: Optional[str] = None
+    ASYNC_DB_POOL_SIZE: int = 20
+    ASYNC_DB_MAX_OVERFLOW: int = 20
 
     # JWT
     SECRET_KEY: str = "your-secret-key-for-jwt"  # Change in production
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Rotating refresh tokens renew access tokens without a password (and bcrypt).
+    # A token rotated less than GRACE_SECONDS ago is honoured again rather than
+    # treated as stolen, so two racing refreshes by one client do not log it out
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: int = 10
 
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = []
@@ -39,7 +49,98 @@ class Settings(BaseSettings):
     EXAM_FILES_DIR: Path = UPLOAD_BASE_DIR / "exams"
     TRAINER_FILES_DIR: Path = UPLOAD_BASE_DIR / "trainers"
     INSTITUTE_FILES_DIR: Path = UPLOAD_BASE_DIR / "institutes"
-    
+
+    # Exam CSV uploads are streamed in chunks and rejected past this size
+    EXAM_CSV_MAX_BYTES: int = 5 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024
+
+    # Largest batch accepted by the bulk offline submission endpoint, in
+    # submissions and in request body bytes (checked before the body is parsed)
+    BULK_SUBMISSION_MAX_ITEMS: int = 5000
+    BULK_SUBMISSION_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # Write-behind exam submissions: attempts are journaled and inserted in batches
+    SUBMISSION_WRITE_BEHIND: bool = False
+    SUBMISSION_FLUSH_INTERVAL_MS: int = 20
+    SUBMISSION_FLUSH_MAX_ROWS: int = 500
+    SUBMISSION_JOURNAL_DIR: Path = UPLOAD_BASE_DIR / "queue"
+    SUBMISSION_JOURNAL_FSYNC: bool = True
+    # Queued attempts held in memory at most; past that, or while flushes are
+    # failing, submissions get 503 with Retry-After
+    SUBMISSION_QUEUE_MAX_PENDING: int = 10000
+    SUBMISSION_RETRY_AFTER_SECONDS: int = 5
+
+    # Certificate PDFs are rendered after issuance on a pool of worker processes,
+    # spawned on the first render.
+    # CERTIFICATE_TEMPLATE_PATH points at a content-stream template; unset uses the built-in layout
+    CERTIFICATE_FILES_DIR: Path = UPLOAD_BASE_DIR / "certificates"
+    CERTIFICATE_TEMPLATE_PATH: Optional[Path] = None
+    CERTIFICATE_RENDER_WORKERS: int = 2
+    CERTIFICATE_RENDER_BATCH_SIZE: int = 100
+
+    # Conditional GET: how long clients may reuse a response, and how long this
+    # worker trusts its cached exam/catalog versions before re-reading them
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 60
+    EXAM_VERSION_CACHE_TTL_SECONDS: int = 30
+    CATALOG_VERSION_CACHE_TTL_SECONDS: int = 30
+
+    # Per-institute exam listings served to candidates
+    INSTITUTE_EXAMS_CACHE_MAX_ENTRIES: int = 1024
+    INSTITUTE_EXAMS_CACHE_TTL_SECONDS: int = 60
+
+    # App worker processes on this host (uvicorn/gunicorn read the same variable).
+    # Process pools below are per worker, so their defaults split the cores by it
+    WEB_CONCURRENCY: int = 1
+
+    # Bulk candidate CSV import: row cap per file, rows per batch (validated,
+    # hashed and inserted together), and the bcrypt processes shared by every
+    # import in a worker (unset uses a quarter of the cores per app worker)
+    CANDIDATE_IMPORT_MAX_ROWS: int = 50000
+    CANDIDATE_IMPORT_BATCH_SIZE: int = 1000
+    CANDIDATE_IMPORT_HASH_WORKERS: Optional[int] = None
+
+    # bcrypt for login and registration runs on HASH_WORKERS processes per app
+    # worker (unset uses half the cores split across WEB_CONCURRENCY workers);
+    # past MAX_PENDING queued calls, requests get 503 with Retry-After instead of waiting
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
+    # Recently failed (email, password) pairs, rejected without running bcrypt again
+    LOGIN_FAILURE_CACHE_MAX_ENTRIES: int = 10000
+    LOGIN_FAILURE_CACHE_TTL_SECONDS: int = 60
+
+    # Rows the system analytics counters are spread over to avoid write contention
+    ANALYTICS_COUNTER_SHARDS: int = 16
+    # Rows each exam's attempt statistics are spread over, for the same reason
+    EXAM_STATS_SHARDS: int = 4
+    # Widest date range a single daily time-series request may cover
+    ANALYTICS_MAX_RANGE_DAYS: int = 366
+
+    # Keyset-paginated admin/trainer listings, and rows fetched per round-trip
+    # (server-side cursor batch) when streaming an export
+    LIST_PAGE_SIZE: int = 100
+    LIST_PAGE_SIZE_MAX: int = 1000
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Item analysis folds in attempts recorded at least SETTLE_SECONDS ago (so
+    # transactions still in flight are not skipped), BATCH_SIZE at a time
+    ITEM_ANALYSIS_SETTLE_SECONDS: int = 60
+    ITEM_ANALYSIS_BATCH_SIZE: int = 2000
+
+    # Authenticated users cached per (token subject, issued-at); the TTL bounds
+    # how long a revocation takes to reach other workers
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # Candidate dashboard progress summaries, cached per candidate
+    CANDIDATE_PROGRESS_CACHE_MAX_ENTRIES: int = 10000
+    CANDIDATE_PROGRESS_CACHE_TTL_SECONDS: int = 300
+
+    # Answer keys (shared by grading and item analysis) and whole-exam bundles, cached per exam version
+    QUESTION_BANK_CACHE_MAX_ENTRIES: int = 512
+    QUESTION_BANK_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    EXAM_BUNDLE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
     @model_validator(mode="after")
     def set_dynamic_fields_and_dirs(self):
         # Construct DB URL if not provided
@@ -49,6 +150,11 @@ class Settings(BaseSettings):
                 f"{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
             )
 
+        if not self.ASYNC_SQLALCHEMY_DATABASE_URL:
+            scheme, _, rest = self.SQLALCHEMY_DATABASE_URL.partition("://")
+            driver = {"postgresql": "postgresql+asyncpg", "postgresql+psycopg2": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+            self.ASYNC_SQLALCHEMY_DATABASE_URL = f"{driver.get(scheme, scheme)}://{rest}"
+
         # Update CORS_ORIGINS if provided
         if self.CORS_ORIGINS:
             self.BACKEND_CORS_ORIGINS = [i.strip() for i in self.CORS_ORIGINS.split(",")]
@@ -59,6 +165,7 @@ class Settings(BaseSettings):
             self.EXAM_FILES_DIR,
             self.TRAINER_FILES_DIR,
             self.INSTITUTE_FILES_DIR,
+            self.CERTIFICATE_FILES_DIR,
         ]:
             path.mkdir(parents=True, exist_ok=True)
 
@@ -1,20 +1,51 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass
+from datetime import timezone
+from typing import List, Optional
+from uuid import UUID
 
 from backend.core.config import settings
 from backend.core.security import verify_token
-from backend.core.db import get_db
-from backend.models.user import User
-from backend.schemas.user import TokenData
+from backend.core.db import get_async_db
+from backend.models.user import User, Candidate, Trainer
+from backend.utils.cache import LRUCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-def get_current_user(
-    db: Session = Depends(get_db),
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as route handlers see it"""
+    id: UUID
+    email: str
+    role: str
+    institute_id: Optional[UUID]
+
+# Principals behind recently seen tokens, keyed by (subject, issued-at), so
+# repeat requests on one token skip the users lookup. The TTL bounds how long
+# another worker may keep accepting a token after users.tokens_valid_after
+# moved past it, since only this worker's entries are dropped by revoke_principal().
+_principals = LRUCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+def revoke_principal(email: str) -> int:
+    """
+    Forget every cached principal of a user, so their next request re-reads
+    the account; call when their access is withdrawn or their role changes
+    """
+    return _principals.discard_where(lambda key: key[0] == email)
+
+def principal_cache_stats() -> dict:
+    return _principals.stats()
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2_scheme)
-) -> User:
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,20 +56,49 @@ def get_current_user(
     if not token_data:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data["sub"]).first()
-    if not user:
+    key = (token_data["sub"], token_data.get("iat"))
+    principal = _principals.get(key)
+    if principal is not None:
+        return principal
+
+    # Runs on every cache miss, so it awaits its query rather than holding the
+    # event loop (or a threadpool slot) for the round-trip
+    row = (await db.execute(
+        select(
+            User.id, User.email, User.role, User.tokens_valid_after,
+            func.coalesce(Candidate.institute_id, Trainer.institute_id).label("institute_id")
+        )
+        .outerjoin(Candidate, Candidate.user_id == User.id)
+        .outerjoin(Trainer, Trainer.user_id == User.id)
+        .where(User.email == token_data["sub"])
+    )).first()
+    # End the read-only transaction so the connection goes back to the async
+    # pool now; sync routes then hold only their own connection while they run
+    await db.rollback()
+    if not row:
         raise credentials_exception
-    return user
+    if row.tokens_valid_after is not None:
+        # Logged out (or its refresh tokens were stolen) after this token was issued
+        valid_after = row.tokens_valid_after
+        if valid_after.tzinfo is None:
+            valid_after = valid_after.replace(tzinfo=timezone.utc)
+        issued_at = token_data.get("iat")
+        if issued_at is None or issued_at < valid_after.timestamp():
+            raise credentials_exception
+    principal = Principal(id=row.id, email=row.email, role=row.role, institute_id=row.institute_id)
+    _principals.set(key, principal)
+    return principal
 
-def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+async def get_current_active_user(
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if not current_user:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 def require_role(roles: List[str]):
-    def role_checker(current_user: User = Depends(get_current_active_user)):
+    # async so FastAPI calls it inline instead of dispatching to the threadpool
+    async def role_checker(current_user: Principal = Depends(get_current_active_user)):
         if current_user.role not in roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -1,18 +1,38 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import logging
 
 from backend.core.config import settings
+from backend.core.db import async_engine
 from backend.routers import auth, candidate, trainer, admin, institute
+from backend.services import candidate_import, certificate_renderer, password_hasher, submission_queue
+from backend.utils.request_limits import BodySizeLimitMiddleware
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start background workers
+    certificate_renderer.start()
+    password_hasher.start()
+    if settings.SUBMISSION_WRITE_BEHIND:
+        submission_queue.start()
+    yield
+    # Drain background workers on shutdown; the queue flush may issue certificates
+    submission_queue.stop()
+    certificate_renderer.stop()
+    password_hasher.stop()
+    candidate_import.stop()
+    await async_engine.dispose()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Log CORS origins for debugging
@@ -27,6 +47,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cap bodies that are parsed whole before the handler can check their size
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        f"{settings.API_V1_STR}/trainer/trainer/exams/submissions/bulk": settings.BULK_SUBMISSION_MAX_BYTES,
+    },
+)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(candidate.router, prefix="/api/v1/candidate", tags=["candidate"])
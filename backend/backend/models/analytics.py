@@ -0,0 +1,94 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, BigInteger, Float, String, UUID
+from sqlalchemy.sql import func
+
+from backend.core.db import Base
+
+class AnalyticsCounter(Base):
+    """
+    One shard of the system-wide analytics counters. Writers add their deltas
+    to a random shard so concurrent transactions rarely contend on one row;
+    the totals are the sum over all shards.
+    """
+    __tablename__ = "analytics_counters"
+
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    total_candidates = Column(BigInteger, nullable=False, default=0, server_default='0')
+    total_trainers = Column(BigInteger, nullable=False, default=0, server_default='0')
+    total_institutes = Column(BigInteger, nullable=False, default=0, server_default='0')
+    total_courses = Column(BigInteger, nullable=False, default=0, server_default='0')
+    total_certificates = Column(BigInteger, nullable=False, default=0, server_default='0')
+    total_attempts = Column(BigInteger, nullable=False, default=0, server_default='0')
+    passed_attempts = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_sum = Column(Float, nullable=False, default=0, server_default='0')
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)  # set on the shard holding a reconciled baseline
+
+class InstituteDailyStats(Base):
+    """Exam and certificate activity of an institute's candidates for one UTC day"""
+    __tablename__ = "institute_daily_stats"
+
+    institute_id = Column(UUID(as_uuid=True), ForeignKey('institutes.id'), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    attempts = Column(BigInteger, nullable=False, default=0, server_default='0')
+    passed_attempts = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_sum = Column(Float, nullable=False, default=0, server_default='0')
+    certificates = Column(BigInteger, nullable=False, default=0, server_default='0')
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ExamStats(Base):
+    """
+    One shard of an exam's attempt aggregates, maintained on every submission.
+    Like the system counters, writers pick a random shard so a heavily taken
+    exam does not serialize on one row; an exam's stats are the sum over its
+    shards. ``score_bucket_<n>`` counts scores in [10n, 10n + 10), with 100%
+    in the top bucket.
+    """
+    __tablename__ = "exam_stats"
+
+    exam_id = Column(UUID(as_uuid=True), ForeignKey('exams.id'), primary_key=True)
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    attempts = Column(BigInteger, nullable=False, default=0, server_default='0')
+    passed_attempts = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_sum = Column(Float, nullable=False, default=0, server_default='0')
+    score_bucket_0 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_bucket_1 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_bucket_2 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_bucket_3 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_bucket_4 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_bucket_5 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_bucket_6 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_bucket_7 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_bucket_8 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    score_bucket_9 = Column(BigInteger, nullable=False, default=0, server_default='0')
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ExamItemAnalysis(Base):
+    """
+    How far an exam's item analysis has got: the question set it was computed
+    against, the attempts folded in so far (up to ``analyzed_through``, a
+    recorded_at high-water mark) and the sums of their total scores.
+    """
+    __tablename__ = "exam_item_analysis"
+
+    exam_id = Column(UUID(as_uuid=True), ForeignKey('exams.id'), primary_key=True)
+    exam_version = Column(String, nullable=True)
+    attempts = Column(BigInteger, nullable=False, default=0, server_default='0')
+    total_score_sum = Column(BigInteger, nullable=False, default=0, server_default='0')
+    total_score_sq_sum = Column(BigInteger, nullable=False, default=0, server_default='0')
+    analyzed_through = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ExamItemStats(Base):
+    """Response counts for one question of an exam, over the attempts folded in so far"""
+    __tablename__ = "exam_item_stats"
+
+    exam_id = Column(UUID(as_uuid=True), ForeignKey('exams.id'), primary_key=True)
+    position = Column(Integer, primary_key=True, autoincrement=False)
+    correct = Column(BigInteger, nullable=False, default=0, server_default='0')
+    option_a = Column(BigInteger, nullable=False, default=0, server_default='0')
+    option_b = Column(BigInteger, nullable=False, default=0, server_default='0')
+    option_c = Column(BigInteger, nullable=False, default=0, server_default='0')
+    option_d = Column(BigInteger, nullable=False, default=0, server_default='0')
+    unanswered = Column(BigInteger, nullable=False, default=0, server_default='0')
+    # Sum of the total scores of the attempts that answered this question correctly
+    correct_total_sum = Column(BigInteger, nullable=False, default=0, server_default='0')
@@ -12,4 +12,5 @@ class CourseCertificate(Base):
     candidate_id = Column(UUID(as_uuid=True), ForeignKey("candidates.user_id"), nullable=False)
     course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), nullable=False)
     certificate_url = Column(String, nullable=False)
-    issued_on = Column(DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
+    issued_on = Column(DateTime(timezone=True), server_default=func.now())
+    rendered_at = Column(DateTime(timezone=True), nullable=True) 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, UUID, Integer
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -14,6 +14,7 @@ class Course(Base):
     pdf_url = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    subject_count = Column(Integer, nullable=False, default=0, server_default='0')  # maintained by create_subject
 
     # Relationships
     subjects = relationship("Subject", back_populates="course")
@@ -26,6 +27,7 @@ class Subject(Base):
     course_id = Column(UUID(as_uuid=True), ForeignKey('courses.id'))
     name = Column(String, nullable=False)
     trainer_id = Column(UUID(as_uuid=True), ForeignKey('trainers.user_id'))
+    institute_id = Column(UUID(as_uuid=True), ForeignKey('institutes.id'), index=True)  # the trainer's institute
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
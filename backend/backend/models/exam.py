@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, UUID, Numeric, Boolean, Float, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, UUID, Numeric, Boolean, Float, JSON, Integer
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -11,16 +11,39 @@ class Exam(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     subject_id = Column(UUID(as_uuid=True), ForeignKey("subjects.id"), nullable=False)
+    institute_id = Column(UUID(as_uuid=True), ForeignKey("institutes.id"), nullable=True, index=True)  # copied from the subject
     title = Column(String, nullable=False)
     csv_url = Column(String, nullable=False)
+    question_count = Column(Integer, nullable=True)  # NULL until the CSV is ingested into exam_questions
+    questions_updated_at = Column(DateTime, nullable=True)
+    csv_sha256 = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
     subject = relationship("Subject", back_populates="exams")
     attempts = relationship("ExamAttempt", back_populates="exam")
 
+class Question(Base):
+    __tablename__ = "exam_questions"
+
+    # (exam_id, position) is the primary key, so page reads are index range scans
+    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    question = Column(String, nullable=False)
+    option_a = Column(String, nullable=False)
+    option_b = Column(String, nullable=False)
+    option_c = Column(String, nullable=False)
+    option_d = Column(String, nullable=False)
+    correct_answer = Column(String(1), nullable=False)
+
 class ExamAttempt(Base):
     __tablename__ = "exam_attempts"
+    __table_args__ = (
+        # An exam's attempts are listed a page at a time in key order
+        Index('ix_exam_attempts_exam_id_id', 'exam_id', 'id'),
+        # Item analysis folds in an exam's attempts in the order they were recorded
+        Index('ix_exam_attempts_exam_id_recorded_at', 'exam_id', 'recorded_at'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     candidate_id = Column(UUID(as_uuid=True), ForeignKey("candidates.user_id"), nullable=False)
@@ -29,6 +52,8 @@ class ExamAttempt(Base):
     passed = Column(Boolean, nullable=False)
     answers = Column(JSON, nullable=True)
     attempted_on = Column(DateTime, default=datetime.utcnow)
+    # When the row was written; offline and write-behind attempts can carry an earlier attempted_on
+    recorded_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
     # Relationships
     candidate = relationship("Candidate", back_populates="exam_attempts")
@@ -42,6 +67,8 @@ class CourseCertificate(Base):
     course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), nullable=False)
     certificate_url = Column(String, nullable=False)
     issued_on = Column(DateTime, default=datetime.utcnow)
+    # NULL until the PDF is written; unrendered certificates are queued again on startup
+    rendered_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     candidate = relationship("Candidate", back_populates="certificates")
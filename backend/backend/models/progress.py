@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, UUID
+from sqlalchemy.sql import func
+
+from backend.core.db import Base
+
+class CandidateSubjectProgress(Base):
+    """A subject the candidate has passed; one row per (candidate, subject) however many passes"""
+    __tablename__ = "candidate_subject_progress"
+
+    candidate_id = Column(UUID(as_uuid=True), ForeignKey('candidates.user_id'), primary_key=True)
+    subject_id = Column(UUID(as_uuid=True), ForeignKey('subjects.id'), primary_key=True)
+    course_id = Column(UUID(as_uuid=True), ForeignKey('courses.id'), index=True)
+    passed_on = Column(DateTime(timezone=True), server_default=func.now())
+
+class CandidateCourseProgress(Base):
+    """Number of distinct subjects of a course the candidate has passed"""
+    __tablename__ = "candidate_course_progress"
+
+    candidate_id = Column(UUID(as_uuid=True), ForeignKey('candidates.user_id'), primary_key=True)
+    course_id = Column(UUID(as_uuid=True), ForeignKey('courses.id'), primary_key=True)
+    passed_subjects = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
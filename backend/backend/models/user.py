@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Enum, DateTime, Boolean, ForeignKey, UUID
+from sqlalchemy import Column, String, Enum, DateTime, Boolean, ForeignKey, Index, UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -16,6 +16,8 @@ class User(Base):
     aadhaar_id = Column(String(12), unique=True, nullable=False)
     full_name = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Access tokens issued before this are rejected (set on logout and token reuse)
+    tokens_valid_after = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     candidate = relationship("Candidate", back_populates="user", uselist=False)
@@ -23,6 +25,10 @@ class User(Base):
 
 class Candidate(Base):
     __tablename__ = "candidates"
+    __table_args__ = (
+        # Per-institute candidate listings page through this in key order
+        Index('ix_candidates_institute_id_user_id', 'institute_id', 'user_id'),
+    )
 
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), primary_key=True)
     institute_id = Column(UUID(as_uuid=True), ForeignKey('institutes.id'))
@@ -44,3 +50,19 @@ class Trainer(Base):
     user = relationship("User", back_populates="trainer")
     institute = relationship("Institute", back_populates="trainers")
     subjects = relationship("Subject", back_populates="trainer")
+
+class RefreshToken(Base):
+    """
+    One refresh token; only its SHA-256 is stored. Each refresh revokes the
+    token it was given and issues a successor in the same family, so a
+    revoked token coming back means it leaked and the family is revoked.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False, index=True)
+    family_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # purged past this
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,82 +1,192 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, File, Query, Request, Response, UploadFile
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from uuid import UUID
+from datetime import date
 
+from backend.core.config import settings
 from backend.core.db import get_db
-from backend.core.dependencies import require_admin
-from backend.models.user import User
+from backend.core.dependencies import Principal, require_admin
 from backend.models.institute import Institute
 from backend.models.course import Course
-from backend.schemas.user import User as UserSchema
-from backend.schemas.institute import InstituteCreate, InstituteInDB, InstituteWithStats
+from backend.schemas.user import User as UserSchema, CandidateImportResult
+from backend.schemas.institute import (
+    InstituteCreate, InstituteInDB, InstituteWithStats, PaginatedInstituteStats
+)
 from backend.schemas.course import CourseCreate, CourseInDB, CourseWithSubjects
 from backend.services import admin as admin_service
+from backend.services import candidate_import, catalog, export
+from backend.utils.http_cache import cache_headers, is_not_modified, make_etag, not_modified
 
 router = APIRouter()
 
 @router.get("/admin/institutes", response_model=List[InstituteInDB])
-async def list_institutes(
+def list_institutes(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_PAGE_SIZE_MAX),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
-    """List all registered institutes"""
-    return admin_service.get_institutes(db)
+    """List registered institutes, a page at a time"""
+    institutes, next_cursor = admin_service.get_institutes(db, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return institutes
+
+@router.get("/admin/institutes/export")
+def export_institutes(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: Principal = Depends(require_admin)
+):
+    """Stream every registered institute as NDJSON or CSV"""
+    return export.streaming_export(admin_service.institutes_query(), format, "institutes")
 
 @router.post("/admin/institutes", response_model=InstituteInDB, status_code=status.HTTP_201_CREATED)
-async def create_institute(
+def create_institute(
     institute: InstituteCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Create a new institute"""
     return admin_service.create_institute(db, institute)
 
+@router.get("/admin/institutes/stats", response_model=PaginatedInstituteStats)
+def list_institute_stats(
+    page: int = Query(1, ge=1, description="Page number (1-based)"),
+    page_size: int = Query(50, ge=1, le=500, description="Number of institutes per page"),
+    sort: str = Query("name", description="Field to sort by, e.g. pass_rate or total_candidates"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
+):
+    """Get statistics for every institute"""
+    return admin_service.get_all_institute_stats(db, page, page_size, sort, order == "desc")
+
 @router.get("/admin/institutes/{institute_id}", response_model=InstituteWithStats)
-async def get_institute_stats(
-    institute_id: str,
+def get_institute_stats(
+    institute_id: UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Get detailed statistics for an institute"""
     return admin_service.get_institute_stats(db, institute_id)
 
+@router.post("/admin/institutes/{institute_id}/certificates/render", status_code=status.HTTP_202_ACCEPTED)
+def rerender_institute_certificates(
+    institute_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
+):
+    """Re-render the certificate PDFs of every candidate in an institute"""
+    return admin_service.rerender_institute_certificates(db, institute_id)
+
 @router.post("/admin/courses", response_model=CourseInDB, status_code=status.HTTP_201_CREATED)
-async def create_course(
+def create_course(
     course: CourseCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Create a new course"""
     return admin_service.create_course(db, course, current_user.id)
 
 @router.get("/admin/courses", response_model=List[CourseWithSubjects])
-async def list_courses(
+def list_courses(
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """List all courses with their subjects"""
-    return admin_service.get_courses(db)
+    version = catalog.get_catalog_version(db)
+    etag = make_etag("courses_with_subjects", version)
+    headers = cache_headers(etag, settings.HTTP_CACHE_MAX_AGE_SECONDS)
+    if is_not_modified(request, etag):
+        return not_modified(headers)
+    return Response(
+        content=admin_service.get_courses(db, version),
+        media_type="application/json",
+        headers=headers
+    )
 
 @router.get("/admin/candidates", response_model=List[UserSchema])
-async def list_candidates(
+def list_candidates(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_PAGE_SIZE_MAX),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
+):
+    """List registered candidates, a page at a time"""
+    candidates, next_cursor = admin_service.get_candidates(db, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return candidates
+
+@router.get("/admin/candidates/export")
+def export_candidates(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: Principal = Depends(require_admin)
+):
+    """Stream every registered candidate as NDJSON or CSV"""
+    return export.streaming_export(admin_service.candidates_query(), format, "candidates")
+
+@router.post("/admin/candidates/import", response_model=CandidateImportResult)
+async def import_candidates(
+    file: UploadFile = File(...),
+    institute_id: Optional[UUID] = Query(None, description="Institute for rows without an institute_id column"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
-    """List all registered candidates"""
-    return admin_service.get_candidates(db)
+    """Register candidates in bulk from a CSV of email, full_name, aadhaar_id, password[, institute_id]"""
+    return await candidate_import.import_candidates_upload(db, file, institute_id)
 
 @router.get("/admin/trainers", response_model=List[UserSchema])
-async def list_trainers(
+def list_trainers(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_PAGE_SIZE_MAX),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
+):
+    """List registered trainers, a page at a time"""
+    trainers, next_cursor = admin_service.get_trainers(db, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trainers
+
+@router.get("/admin/trainers/export")
+def export_trainers(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: Principal = Depends(require_admin)
 ):
-    """List all registered trainers"""
-    return admin_service.get_trainers(db)
+    """Stream every registered trainer as NDJSON or CSV"""
+    return export.streaming_export(admin_service.trainers_query(), format, "trainers")
 
 @router.get("/admin/analytics")
-async def get_analytics(
+def get_analytics(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Get system-wide analytics"""
     return admin_service.get_system_analytics(db)
+
+@router.get("/admin/analytics/daily")
+def get_daily_analytics(
+    start: date,
+    end: date,
+    level: str = Query("district", pattern="^(state|district|block|institute)$"),
+    district: Optional[str] = None,
+    block: Optional[str] = None,
+    institute_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
+):
+    """Get daily exam and certificate activity rolled up by state, district, block or institute"""
+    return admin_service.get_daily_analytics(db, start, end, level, district, block, institute_id)
+
+@router.get("/admin/metrics")
+def get_metrics(
+    current_user: Principal = Depends(require_admin)
+):
+    """Get in-process cache and pipeline metrics for this worker"""
+    return admin_service.get_runtime_metrics()
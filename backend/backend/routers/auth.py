@@ -1,37 +1,39 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from backend.core.db import get_db
+from backend.core.db import get_async_db
 from backend.core.config import settings
 from backend.core.security import create_access_token
 from backend.services import auth as auth_service
-from backend.schemas.user import UserCreate, Token
+from backend.schemas.user import UserCreate, Token, RefreshRequest
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-@router.post("/register", response_model=Token)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user (candidate/trainer) and return access token"""
-    user = auth_service.register_user(db, user_data)
-    
+def _token_response(user, refresh_token: str) -> dict:
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email, "role": user.role},
         expires_delta=access_token_expires
     )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/register", response_model=Token)
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Register a new user (candidate/trainer) and return access token"""
+    user = await auth_service.register_user(db, user_data)
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return _token_response(user, await auth_service.issue_refresh_token(db, user.id))
 
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login and get access token"""
-    user = auth_service.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth_service.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -39,10 +41,15 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role},
-        expires_delta=access_token_expires
-    )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
+    return _token_response(user, await auth_service.issue_refresh_token(db, user.id))
+
+@router.post("/refresh", response_model=Token)
+async def refresh(body: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access token and refresh token"""
+    user, refresh_token = await auth_service.rotate_refresh_token(db, body.refresh_token)
+    return _token_response(user, refresh_token)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(body: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Revoke a refresh token and every token rotated from the same login"""
+    await auth_service.revoke_refresh_token(db, body.refresh_token)
@@ -1,75 +1,124 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
-from backend.core.dependencies import get_current_user, get_db
-from backend.models.user import User
+from backend.core.config import settings
+from backend.core.db import get_async_db
+from backend.core.dependencies import Principal, get_current_user
 from backend.schemas.exam import (
     ExamInDB, ExamAttemptInDB, ExamSubmission, ExamResult,
     ExamQuestionResponse, PaginatedExamQuestions
 )
 from backend.schemas.course import CourseCertificateInDB
 from backend.services import candidate as candidate_service
+from backend.services import catalog, question_bank
+from backend.utils.http_cache import (
+    accepts_gzip, cache_headers, is_not_modified, make_etag, not_modified
+)
 
 router = APIRouter()
 
 @router.get("/courses", response_model=List[dict])
 async def list_available_courses(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """List all available courses"""
-    return candidate_service.get_available_courses(db)
+    version = await db.run_sync(catalog.get_catalog_version)
+    etag = make_etag("courses", version)
+    headers = cache_headers(etag, settings.HTTP_CACHE_MAX_AGE_SECONDS)
+    if is_not_modified(request, etag):
+        return not_modified(headers)
+    return Response(
+        content=await candidate_service.get_available_courses(db, version),
+        media_type="application/json",
+        headers=headers
+    )
 
 @router.get("/exams", response_model=List[ExamInDB])
 async def list_available_exams(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """List all available exams for the candidate"""
-    return candidate_service.get_available_exams(db, current_user.id)
+    return await candidate_service.get_available_exams(db, current_user.id)
 
 @router.post("/exams/submit", response_model=ExamResult)
 async def submit_exam(
     submission: ExamSubmission,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Submit an exam attempt"""
-    return candidate_service.submit_exam(db, submission, current_user.id)
+    return await candidate_service.submit_exam(db, submission, current_user.id)
 
 @router.get("/attempts", response_model=List[ExamAttemptInDB])
 async def list_exam_attempts(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """List all exam attempts for the candidate"""
-    return candidate_service.get_exam_attempts(db, current_user.id)
+    return await candidate_service.get_exam_attempts(db, current_user.id)
 
 @router.get("/certificates", response_model=List[CourseCertificateInDB])
 async def list_certificates(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """List all certificates earned by the candidate"""
-    return candidate_service.get_certificates(db, current_user.id)
+    return await candidate_service.get_certificates(db, current_user.id)
 
 @router.get("/progress", response_model=dict)
 async def get_progress(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get candidate's progress across courses"""
-    return candidate_service.get_candidate_progress(db, current_user.id)
+    return await candidate_service.get_candidate_progress(db, current_user.id)
 
 @router.get("/exams/{exam_id}/questions", response_model=PaginatedExamQuestions)
 async def get_exam_questions(
     exam_id: UUID,
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number (1-based)"),
     page_size: int = Query(10, ge=1, le=50, description="Number of questions per page"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get paginated questions for an exam without correct answers"""
-    return candidate_service.get_exam_questions(db, exam_id, page, page_size)
+    version = await db.run_sync(question_bank.get_exam_version, exam_id)
+    if version is not None:
+        etag = make_etag("questions", exam_id, version, page, page_size)
+        headers = cache_headers(etag, settings.HTTP_CACHE_MAX_AGE_SECONDS)
+        if is_not_modified(request, etag):
+            return not_modified(headers)
+        response.headers.update(headers)
+    return await candidate_service.get_exam_questions(db, exam_id, page, page_size)
+
+@router.get("/exams/{exam_id}/bundle")
+async def get_exam_bundle(
+    exam_id: UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Download every question of an exam (without answers) as one JSON document, gzip-compressed if accepted"""
+    version = await db.run_sync(question_bank.get_exam_version, exam_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Exam or questions not found")
+    
+    # The gzip and identity bodies are different representations, so each
+    # gets its own strong validator
+    use_gzip = accepts_gzip(request)
+    etag = make_etag("bundle", exam_id, version, "gzip" if use_gzip else "identity")
+    headers = {**cache_headers(etag, settings.HTTP_CACHE_MAX_AGE_SECONDS), "Vary": "Accept-Encoding"}
+    if is_not_modified(request, etag):
+        return not_modified(headers)
+    
+    bundle = await candidate_service.get_exam_bundle(db, exam_id, use_gzip)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+    return Response(bundle, media_type="application/json", headers=headers)
@@ -9,7 +9,7 @@ from backend.services import institute as institute_service
 router = APIRouter()
 
 @router.post("/institutes", response_model=InstituteInDB, status_code=status.HTTP_201_CREATED)
-async def create_institute(
+def create_institute(
     institute: InstituteCreate,
     db: Session = Depends(get_db)
 ):
@@ -17,7 +17,7 @@ async def create_institute(
     return institute_service.create_institute(db, institute)
 
 @router.get("/institutes", response_model=List[InstituteInDB])
-async def list_institutes(
+def list_institutes(
     db: Session = Depends(get_db)
 ):
     """List all institutes"""
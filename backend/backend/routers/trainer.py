@@ -1,50 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
+from backend.core.config import settings
 from backend.core.db import get_db
-from backend.core.dependencies import require_trainer
-from backend.models.user import User, Trainer
+from backend.core.dependencies import Principal, require_trainer
+from backend.models.user import Trainer
 from backend.models.course import Subject
 from backend.models.exam import Exam
 from backend.schemas.course import SubjectCreate, SubjectInDB, CourseInDB
-from backend.schemas.exam import ExamCreate, ExamInDB
+from backend.schemas.exam import ExamCreate, ExamInDB, BulkExamSubmission, BulkSubmissionResult
 from backend.schemas.user import UserResponse
 from backend.services import trainer as trainer_service
+from backend.services import catalog, export
+from backend.utils.http_cache import cache_headers, is_not_modified, make_etag, not_modified
 
 router = APIRouter()
 
 @router.get("/trainer/subjects", response_model=List[SubjectInDB])
-async def list_subjects(
+def list_subjects(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_trainer)
+    current_user: Principal = Depends(require_trainer)
 ):
     """List all subjects assigned to the trainer"""
     return trainer_service.get_trainer_subjects(db, current_user.id)
 
 @router.post("/trainer/subjects", response_model=SubjectInDB, status_code=status.HTTP_201_CREATED)
-async def create_subject(
+def create_subject(
     subject: SubjectCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_trainer)
+    current_user: Principal = Depends(require_trainer)
 ):
     """Create a new subject"""
     return trainer_service.create_subject(db, subject, current_user.id)
 
 @router.post("/trainer/exams", response_model=ExamInDB, status_code=status.HTTP_201_CREATED)
-async def create_exam(
+def create_exam(
     exam: ExamCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_trainer)
+    current_user: Principal = Depends(require_trainer)
 ):
     """Create a new exam for a subject"""
     return trainer_service.create_exam(db, exam, current_user.id)
 
 @router.get("/trainer/exams", response_model=List[ExamInDB])
-async def list_exams(
+def list_exams(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_trainer)
+    current_user: Principal = Depends(require_trainer)
 ):
     """List all exams created by the trainer"""
     return trainer_service.get_trainer_exams(db, current_user.id)
@@ -54,32 +57,78 @@ async def upload_exam_csv(
     exam_id: UUID,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_trainer)
+    current_user: Principal = Depends(require_trainer)
 ):
     """Upload CSV file for exam questions"""
     return await trainer_service.upload_exam_csv(db, exam_id, file, current_user.id)
 
+@router.post("/trainer/exams/submissions/bulk", response_model=BulkSubmissionResult)
+def submit_offline_exams(
+    bulk: BulkExamSubmission,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_trainer)
+):
+    """Grade and record exam submissions collected offline at an exam centre"""
+    return trainer_service.submit_offline_exams(db, bulk, current_user.id)
+
 @router.get("/trainer/candidates", response_model=List[UserResponse])
-async def list_candidates(
+def list_candidates(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_PAGE_SIZE_MAX),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_trainer)
+):
+    """List the candidates in the trainer's institute, a page at a time"""
+    candidates, next_cursor = trainer_service.get_institute_candidates(db, current_user.id, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return candidates
+
+@router.get("/trainer/candidates/export")
+def export_candidates(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_trainer)
+    current_user: Principal = Depends(require_trainer)
 ):
-    """List all candidates in the trainer's institute"""
-    return trainer_service.get_institute_candidates(db, current_user.id)
+    """Stream every candidate in the trainer's institute as NDJSON or CSV"""
+    query = trainer_service.institute_candidates_query(db, current_user.id)
+    return export.streaming_export(query, format, "candidates")
 
 @router.get("/trainer/exams/{exam_id}/results")
-async def get_exam_results(
+def get_exam_results(
+    exam_id: UUID,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_PAGE_SIZE_MAX),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_trainer)
+):
+    """Get exam statistics and a page of its attempts"""
+    return trainer_service.get_exam_results(db, exam_id, current_user.id, cursor, limit)
+
+@router.get("/trainer/exams/{exam_id}/item-analysis")
+def get_exam_item_analysis(
     exam_id: UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_trainer)
+    current_user: Principal = Depends(require_trainer)
 ):
-    """Get exam results and statistics"""
-    return trainer_service.get_exam_results(db, exam_id, current_user.id)
+    """Get per-question difficulty, option distribution and discrimination for an exam"""
+    return trainer_service.get_exam_item_analysis(db, exam_id, current_user.id)
 
 @router.get("/trainer/courses", response_model=List[CourseInDB])
-async def list_courses(
+def list_courses(
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_trainer)
+    current_user: Principal = Depends(require_trainer)
 ):
     """List all courses available for the trainer's institute"""
-    return trainer_service.get_trainer_courses(db, current_user.id)
+    version = catalog.get_catalog_version(db)
+    etag = make_etag("courses", version)
+    headers = cache_headers(etag, settings.HTTP_CACHE_MAX_AGE_SECONDS)
+    if is_not_modified(request, etag):
+        return not_modified(headers)
+    return Response(
+        content=trainer_service.get_trainer_courses(db, version),
+        media_type="application/json",
+        headers=headers
+    )
@@ -1,9 +1,11 @@
-from pydantic import BaseModel, HttpUrl, UUID4
+from pydantic import BaseModel, Field, HttpUrl, UUID4
 from typing import Optional, List, Dict
 from datetime import datetime
 from uuid import UUID
 from decimal import Decimal
 
+from backend.core.config import settings
+
 class ExamBase(BaseModel):
     title: str
     subject_id: UUID4
@@ -74,6 +76,25 @@ class ExamResult(BaseModel):
     correct_answers: int
     attempted_on: datetime
 
+class OfflineExamSubmission(ExamSubmission):
+    candidate_id: UUID4
+    attempted_on: Optional[datetime] = None  # when the centre recorded it; defaults to receipt time
+
+class BulkExamSubmission(BaseModel):
+    submissions: List[OfflineExamSubmission] = Field(max_length=settings.BULK_SUBMISSION_MAX_ITEMS)
+
+class BulkSubmissionItemResult(BaseModel):
+    index: int  # position in the submitted list
+    exam_id: UUID4
+    candidate_id: UUID4
+    result: Optional[ExamResult] = None
+    error: Optional[str] = None
+
+class BulkSubmissionResult(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[BulkSubmissionItemResult]
+
 class CourseCertificateBase(BaseModel):
     course_id: UUID
     certificate_url: HttpUrl
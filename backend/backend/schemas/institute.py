@@ -23,7 +23,17 @@ class InstituteWithStats(InstituteInDB):
     total_trainers: int
     total_subjects: int
     total_exams: int
+    total_certificates: int
+    total_attempts: int
+    passed_attempts: int
     pass_rate: float
 
     class Config:
         from_attributes = True
+
+class PaginatedInstituteStats(BaseModel):
+    institutes: List[InstituteWithStats]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -56,9 +56,23 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class CandidateImportError(BaseModel):
+    line: int  # CSV line number, header is line 1
+    email: Optional[str] = None
+    error: str
+
+class CandidateImportResult(BaseModel):
+    imported: int
+    rejected: int
+    errors: List[CandidateImportError]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: str
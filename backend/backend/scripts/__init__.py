@@ -0,0 +1,2 @@
+# Register every model so relationships resolve when a script runs outside the app
+from backend.models import user, institute, course, exam, progress, analytics  # noqa: F401
@@ -0,0 +1,77 @@
+r"""
+Measure API throughput under concurrent load.
+
+Logs in once, keeps --concurrency requests in flight against --path until
+--requests have completed, and reports throughput and latency percentiles.
+Point it at a single uvicorn worker before and after a change to see how
+far one worker scales with in-flight database I/O.
+
+Usage:
+    python -m backend.scripts.benchmark_concurrency --base-url http://localhost:8000 \
+        --email candidate@example.com --password secret \
+        --path /api/v1/candidate/attempts --concurrency 64 --requests 5000
+
+Recorded results are in benchmark_concurrency_results.md next to this script.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def run(args) -> None:
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        login = await client.post(
+            "/api/v1/auth/login", data={"username": args.email, "password": args.password}
+        )
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        latencies = []
+        errors = 0
+        remaining = args.requests
+
+        async def worker() -> None:
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(args.path, headers=headers)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"{args.path}: {len(latencies)} requests, concurrency {args.concurrency}, {errors} errors")
+    print(f"  throughput  {len(latencies) / elapsed:.1f} req/s")
+    print(f"  latency ms  mean {statistics.mean(latencies) * 1000:.1f}  p50 {percentile(0.50):.1f}  "
+          f"p95 {percentile(0.95):.1f}  p99 {percentile(0.99):.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--path", default="/api/v1/candidate/attempts")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Register candidates in bulk from a CSV file.
+
+Columns: email, full_name, aadhaar_id, password and optionally institute_id.
+
+Usage:
+    python -m backend.scripts.import_candidates candidates.csv [--institute-id UUID]
+"""
+import argparse
+import logging
+from uuid import UUID
+
+from fastapi import HTTPException
+
+from backend.core.db import SessionLocal
+from backend.services import candidate_import
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv_path")
+    parser.add_argument("--institute-id", type=UUID, help="institute for rows without an institute_id column")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.csv_path, "r", encoding="utf-8-sig", newline="") as f:
+            result = candidate_import.import_candidates(db, f, args.institute_id)
+    except HTTPException as e:
+        raise SystemExit(e.detail)
+    finally:
+        db.close()
+        candidate_import.stop()
+
+    for error in result.errors:
+        logger.warning(f"Line {error.line} ({error.email or '-'}): {error.error}")
+    logger.info(f"Imported {result.imported} candidates, rejected {result.rejected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Load exam_questions rows for exams whose CSV was uploaded before the table existed.
+
+Usage:
+    python -m backend.scripts.ingest_exam_questions
+"""
+import logging
+
+from fastapi import HTTPException
+
+from backend.core.db import SessionLocal
+from backend.models.exam import Exam
+from backend.services import question_bank
+from backend.utils.exam_csv import iter_exam_rows
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        exams = db.query(Exam).filter(Exam.question_count.is_(None)).all()
+        for exam in exams:
+            try:
+                csv_path = question_bank.resolve_exam_file(exam)
+            except HTTPException:
+                logger.warning(f"Skipping exam {exam.id}: CSV {exam.csv_url} not found")
+                continue
+            with open(csv_path, "r", newline="") as f:
+                count = question_bank.store_exam_questions(db, exam, iter_exam_rows(f))
+            db.commit()
+            logger.info(f"Ingested {count} questions for exam {exam.id}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
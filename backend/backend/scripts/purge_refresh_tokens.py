@@ -0,0 +1,34 @@
+"""
+Delete expired refresh tokens.
+
+Every login adds a row and every refresh adds another, so run this on a
+schedule (e.g. daily) to keep refresh_tokens bounded by the live sessions.
+
+Usage:
+    python -m backend.scripts.purge_refresh_tokens [--batch-size N]
+"""
+import argparse
+import logging
+
+from backend.core.db import SessionLocal
+from backend.services import auth
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=10000, help="rows deleted per transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        purged = auth.purge_expired_refresh_tokens(db, args.batch_size)
+        logger.info(f"Purged {purged} expired refresh tokens")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Rebuild courses.subject_count and the candidate progress tables from exam attempts.
+
+Run after restoring data or if the progress tables are suspected to have
+drifted; the API keeps them up to date incrementally otherwise.
+
+Usage:
+    python -m backend.scripts.rebuild_progress [--issue-certificates]
+"""
+import argparse
+import logging
+
+from backend.core.db import SessionLocal
+from backend.models.exam import CourseCertificate
+from backend.models.progress import CandidateCourseProgress
+from backend.services import certificate as certificate_service
+from backend.services import progress
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--issue-certificates", action="store_true",
+        help="also issue certificates for completed courses that are missing one"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        subject_rows, course_rows = progress.rebuild(db)
+        logger.info(f"Rebuilt {subject_rows} subject progress rows and {course_rows} course progress rows")
+
+        if args.issue_certificates:
+            pairs = db.query(
+                CandidateCourseProgress.candidate_id, CandidateCourseProgress.course_id
+            ).outerjoin(
+                CourseCertificate,
+                (CourseCertificate.candidate_id == CandidateCourseProgress.candidate_id)
+                & (CourseCertificate.course_id == CandidateCourseProgress.course_id)
+            ).filter(CourseCertificate.id.is_(None)).all()
+            issued = sum(
+                1 for candidate_id, course_id in pairs
+                if certificate_service.evaluate_course_certificate(db, candidate_id, course_id)
+            )
+            logger.info(f"Issued {issued} missing certificates")
+
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Recompute the system analytics counters and per-exam stats from the base tables.
+
+The API maintains the counters in the same transaction as the rows they
+count; run this after manual data fixes or to verify that nothing drifted.
+
+Usage:
+    python -m backend.scripts.reconcile_analytics
+"""
+import logging
+
+from backend.core.db import SessionLocal
+from backend.services import analytics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        drift = analytics.reconcile(db)
+        db.commit()
+        for name, (before, after) in drift.items():
+            logger.warning(f"Analytics counter {name} had drifted: {before} -> {after}")
+        logger.info(f"Reconciled analytics counters ({len(drift)} drifted)")
+        exams = analytics.refresh_exam_stats(db)
+        db.commit()
+        logger.info(f"Rebuilt stats for {exams} exams")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Rebuild institute_daily_stats buckets from exam attempts and certificates.
+
+With no arguments every day is rebuilt (the initial backfill). A scheduled
+run can pass --days to re-derive only the most recent days, which also
+repairs buckets missed by anything that wrote rows outside the API.
+
+Usage:
+    python -m backend.scripts.refresh_daily_stats [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--days N]
+"""
+from datetime import date, datetime, timedelta
+import argparse
+import logging
+
+from backend.core.db import SessionLocal
+from backend.services import analytics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", type=date.fromisoformat, help="first day to rebuild")
+    parser.add_argument("--until", type=date.fromisoformat, help="last day to rebuild")
+    parser.add_argument("--days", type=int, help="rebuild this many most recent days (overrides --since)")
+    args = parser.parse_args()
+
+    since = args.since
+    if args.days:
+        since = datetime.utcnow().date() - timedelta(days=args.days - 1)
+
+    db = SessionLocal()
+    try:
+        buckets = analytics.refresh_daily(db, since, args.until)
+        db.commit()
+        logger.info(f"Rebuilt {buckets} daily institute buckets ({since or 'start'} to {args.until or 'today'})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
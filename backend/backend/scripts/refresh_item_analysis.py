@@ -0,0 +1,29 @@
+"""
+Fold newly recorded exam attempts into every exam's item analysis.
+
+The trainer endpoint refreshes an exam on demand; running this on a schedule
+keeps that refresh small for busy exams.
+
+Usage:
+    python -m backend.scripts.refresh_item_analysis
+"""
+import logging
+
+from backend.core.db import SessionLocal
+from backend.services import item_analysis
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        count = item_analysis.refresh_all(db)
+        logger.info(f"Refreshed item analysis of {count} exams")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,79 @@
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import select, Select
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
+from datetime import date
 
+from backend.core.config import settings
+from backend.core.dependencies import principal_cache_stats
 from backend.models.user import User, Candidate, Trainer
 from backend.models.institute import Institute
 from backend.models.course import Course
-from backend.models.exam import ExamAttempt, CourseCertificate
 from backend.schemas.institute import InstituteCreate
 from backend.schemas.course import CourseCreate, CourseInDB
+from backend.services import analytics, auth, catalog, certificate_renderer, institute_stats, password_hasher, progress, question_bank, submission_queue
+from backend.utils.pagination import InvalidCursor, keyset_page
 
-def get_institutes(db: Session) -> List[Institute]:
-    return db.query(Institute).all()
+def institutes_query() -> Select:
+    return select(Institute.id, Institute.name, Institute.district, Institute.block, Institute.created_at)
+
+def candidates_query() -> Select:
+    return select(
+        Candidate.user_id.label("id"), User.email, User.full_name, User.aadhaar_id, User.role, User.created_at,
+        Candidate.institute_id, Candidate.is_ekyc_verified
+    ).join(User, User.id == Candidate.user_id)
+
+def trainers_query() -> Select:
+    return select(
+        Trainer.user_id.label("id"), User.email, User.full_name, User.aadhaar_id, User.role, User.created_at,
+        Trainer.institute_id
+    ).join(User, User.id == Trainer.user_id)
+
+def _page(db: Session, query: Select, key_column, cursor: Optional[str], limit: int) -> Tuple[List[Dict], Optional[str]]:
+    try:
+        return keyset_page(db, query, key_column, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def get_institutes(db: Session, cursor: Optional[str], limit: int) -> Tuple[List[Dict], Optional[str]]:
+    return _page(db, institutes_query(), Institute.id, cursor, limit)
 
 def create_institute(db: Session, institute: InstituteCreate) -> Institute:
     db_institute = Institute(**institute.dict())
     db.add(db_institute)
+    analytics.record(db, total_institutes=1)
     db.commit()
     db.refresh(db_institute)
     return db_institute
 
 def get_institute_stats(db: Session, institute_id: UUID) -> dict:
-    institute = db.query(Institute).filter(Institute.id == institute_id).first()
-    if not institute:
+    rows, _ = institute_stats.query_institute_stats(db, institute_id=institute_id)
+    if not rows:
         raise HTTPException(status_code=404, detail="Institute not found")
-    
-    # Get basic counts
-    total_candidates = db.query(Candidate).filter(Candidate.institute_id == institute_id).count()
-    total_trainers = db.query(Trainer).filter(Trainer.institute_id == institute_id).count()
-    
-    # Get course completion stats
-    total_courses = db.query(Course).count()
-    completed_courses = db.query(CourseCertificate).join(
-        Candidate, CourseCertificate.candidate_id == Candidate.user_id
-    ).filter(Candidate.institute_id == institute_id).count()
-    
-    # Calculate pass rate
-    total_attempts = db.query(ExamAttempt).join(
-        Candidate, ExamAttempt.candidate_id == Candidate.user_id
-    ).filter(Candidate.institute_id == institute_id).count()
-    
-    passed_attempts = db.query(ExamAttempt).join(
-        Candidate, ExamAttempt.candidate_id == Candidate.user_id
-    ).filter(
-        Candidate.institute_id == institute_id,
-        ExamAttempt.passed == True
-    ).count()
-    
-    pass_rate = (passed_attempts / total_attempts * 100) if total_attempts > 0 else 0
+    return rows[0]
+
+def get_all_institute_stats(
+    db: Session,
+    page: int = 1,
+    page_size: int = 50,
+    sort: str = "name",
+    descending: bool = False
+) -> dict:
+    """Stats for every institute, sorted and paginated"""
+    try:
+        rows, total = institute_stats.query_institute_stats(
+            db, sort=sort, descending=descending, offset=(page - 1) * page_size, limit=page_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
-        **institute.__dict__,
-        "total_candidates": total_candidates,
-        "total_trainers": total_trainers,
-        "total_courses": total_courses,
-        "completed_courses": completed_courses,
-        "pass_rate": pass_rate
+        "institutes": rows,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size
     }
 
 def create_course(db: Session, course: CourseCreate, created_by: str) -> CourseInDB:
@@ -71,43 +89,83 @@ def create_course(db: Session, course: CourseCreate, created_by: str) -> CourseI
         created_by=created_by
     )
     db.add(db_course)
+    analytics.record(db, total_courses=1)
     db.commit()
     db.refresh(db_course)
+    catalog.bump_catalog_version()
+    progress.invalidate_all()
     return CourseInDB.from_orm(db_course)
 
-def get_courses(db: Session) -> List[Course]:
-    return db.query(Course).all()
+def get_courses(db: Session, version: str) -> bytes:
+    """Serialized courses with their subjects for catalog ``version``"""
+    return catalog.get_courses_with_subjects_json(db, version)
 
-def get_candidates(db: Session) -> List[User]:
-    return db.query(User).join(Candidate).all()
+def get_candidates(db: Session, cursor: Optional[str], limit: int) -> Tuple[List[Dict], Optional[str]]:
+    return _page(db, candidates_query(), Candidate.user_id, cursor, limit)
 
-def get_trainers(db: Session) -> List[User]:
-    return db.query(User).join(Trainer).all()
+def get_trainers(db: Session, cursor: Optional[str], limit: int) -> Tuple[List[Dict], Optional[str]]:
+    return _page(db, trainers_query(), Trainer.user_id, cursor, limit)
 
 def get_system_analytics(db: Session) -> dict:
-    # Get total counts
-    total_candidates = db.query(Candidate).count()
-    total_trainers = db.query(Trainer).count()
-    total_institutes = db.query(Institute).count()
-    total_courses = db.query(Course).count()
+    # Maintained transactionally by every insert path, so one aggregate over the counter shards
+    totals = analytics.get_totals(db)
+    total_attempts = totals["total_attempts"]
     
-    # Get exam statistics
-    exam_stats = db.query(
-        func.count(ExamAttempt.id).label('total_attempts'),
-        func.avg(ExamAttempt.score_percentage).label('avg_score'),
-        func.count(ExamAttempt.id).filter(ExamAttempt.passed == True).label('passed_attempts')
-    ).first()
-    
-    # Get certificate statistics
-    total_certificates = db.query(CourseCertificate).count()
+    return {
+        "total_candidates": totals["total_candidates"],
+        "total_trainers": totals["total_trainers"],
+        "total_institutes": totals["total_institutes"],
+        "total_courses": totals["total_courses"],
+        "total_exam_attempts": total_attempts,
+        "average_exam_score": (totals["score_sum"] / total_attempts) if total_attempts > 0 else 0,
+        "pass_rate": (totals["passed_attempts"] / total_attempts * 100) if total_attempts > 0 else 0,
+        "total_certificates_issued": totals["total_certificates"],
+        # Counters commit with the rows they count; these say when they last moved
+        # and when they were last checked against the base tables
+        "consistency": "transactional",
+        "counters_updated_at": totals["updated_at"],
+        "last_reconciled_at": totals["reconciled_at"]
+    }
+
+def get_daily_analytics(
+    db: Session,
+    start: date,
+    end: date,
+    level: str,
+    district: Optional[str] = None,
+    block: Optional[str] = None,
+    institute_id: Optional[UUID] = None
+) -> List[dict]:
+    """Daily attempts, passes, scores and certificates for a date range, by geography"""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > settings.ANALYTICS_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range may span at most {settings.ANALYTICS_MAX_RANGE_DAYS} days"
+        )
+    return analytics.get_daily_series(db, start, end, level, district, block, institute_id)
+
+def get_runtime_metrics() -> dict:
+    """In-process cache and pipeline counters for this worker"""
+    return {
+        "question_bank_cache": question_bank.cache_stats(),
+        "submission_queue": submission_queue.stats(),
+        "certificate_renderer": certificate_renderer.stats(),
+        "candidate_progress_cache": progress.cache_stats(),
+        "catalog_cache": catalog.cache_stats(),
+        "password_hasher": password_hasher.stats(),
+        "failed_login_cache": auth.failed_login_cache_stats(),
+        "principal_cache": principal_cache_stats(),
+    }
+
+def rerender_institute_certificates(db: Session, institute_id: UUID) -> dict:
+    """Queue every certificate of an institute's candidates for re-rendering"""
+    institute = db.query(Institute).filter(Institute.id == institute_id).first()
+    if not institute:
+        raise HTTPException(status_code=404, detail="Institute not found")
     
     return {
-        "total_candidates": total_candidates,
-        "total_trainers": total_trainers,
-        "total_institutes": total_institutes,
-        "total_courses": total_courses,
-        "total_exam_attempts": exam_stats.total_attempts,
-        "average_exam_score": float(exam_stats.avg_score) if exam_stats.avg_score else 0,
-        "pass_rate": (exam_stats.passed_attempts / exam_stats.total_attempts * 100) if exam_stats.total_attempts > 0 else 0,
-        "total_certificates_issued": total_certificates
-    } 
\ No newline at end of file
+        "institute_id": institute_id,
+        "queued": certificate_renderer.render_institute(db, institute_id)
+    }
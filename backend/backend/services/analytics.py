@@ -0,0 +1,350 @@
+"""
+System-wide analytics counters.
+
+Every code path that inserts a candidate, trainer, institute, course,
+certificate or exam attempt adds its deltas to ``analytics_counters`` in the
+same transaction, so the analytics endpoint reads one aggregate over a
+handful of shard rows instead of counting the base tables. ``reconcile``
+recomputes the counters from the base tables if they are ever suspected to
+have drifted (e.g. after manual data fixes).
+
+Attempts and certificates are also bucketed per institute and UTC day in
+``institute_daily_stats``, which time-series queries roll up to block,
+district or state level. ``refresh_daily`` rebuilds a range of days from
+the base tables, for backfills and scheduled incremental catch-up.
+
+Per-exam attempt counts, score sums and a score histogram are kept in
+``exam_stats`` the same way, so an exam's results summary never scans its
+attempts; ``refresh_exam_stats`` rebuilds them.
+"""
+from sqlalchemy import and_, case, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+import random
+
+from backend.core.config import settings
+from backend.core.db import upsert
+from backend.models.analytics import AnalyticsCounter, ExamStats, InstituteDailyStats
+from backend.models.course import Course
+from backend.models.exam import ExamAttempt, CourseCertificate
+from backend.models.institute import Institute
+from backend.models.user import Candidate, Trainer
+
+DAILY_COUNTERS = ("attempts", "passed_attempts", "score_sum", "certificates")
+
+# Score histogram: ten bands of ten percentage points
+SCORE_BUCKETS = 10
+EXAM_COUNTERS = (
+    "attempts", "passed_attempts", "score_sum",
+    *(f"score_bucket_{bucket}" for bucket in range(SCORE_BUCKETS)),
+)
+
+COUNTERS = (
+    "total_candidates", "total_trainers", "total_institutes", "total_courses",
+    "total_certificates", "total_attempts", "passed_attempts", "score_sum",
+)
+
+def record(db: Session, **deltas) -> None:
+    """Add ``deltas`` (counter name -> amount) to a random shard; the caller commits"""
+    deltas = {name: amount for name, amount in deltas.items() if amount}
+    if not deltas:
+        return
+    unknown = set(deltas) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown analytics counters: {', '.join(sorted(unknown))}")
+    
+    statement = upsert(db, AnalyticsCounter).values(
+        shard=random.randrange(settings.ANALYTICS_COUNTER_SHARDS), **deltas
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["shard"],
+        set_={
+            **{name: getattr(AnalyticsCounter, name) + statement.excluded[name] for name in deltas},
+            "updated_at": func.now(),
+        }
+    ))
+
+def record_attempts(db: Session, attempts: Iterable[Dict]) -> None:
+    """
+    Count inserted exam attempts in the system counters, daily institute
+    buckets and per-exam stats; each attempt is a dict or row with
+    candidate_id, exam_id, attempted_on, score_percentage and passed.
+    """
+    attempts = list(attempts)
+    if not attempts:
+        return
+    
+    total = passed = 0
+    score_sum = 0.0
+    buckets = defaultdict(lambda: {"attempts": 0, "passed_attempts": 0, "score_sum": 0.0, "certificates": 0})
+    exams = defaultdict(lambda: dict.fromkeys(EXAM_COUNTERS, 0))
+    institutes = _institutes_of(db, {attempt["candidate_id"] for attempt in attempts})
+    for attempt in attempts:
+        exam = exams[attempt["exam_id"]]
+        exam["attempts"] += 1
+        exam["passed_attempts"] += bool(attempt["passed"])
+        exam["score_sum"] += attempt["score_percentage"]
+        exam[f"score_bucket_{score_bucket(attempt['score_percentage'])}"] += 1
+        total += 1
+        passed += bool(attempt["passed"])
+        score_sum += attempt["score_percentage"]
+        institute_id = institutes.get(attempt["candidate_id"])
+        if institute_id is not None:
+            bucket = buckets[(institute_id, attempt["attempted_on"].date())]
+            bucket["attempts"] += 1
+            bucket["passed_attempts"] += bool(attempt["passed"])
+            bucket["score_sum"] += attempt["score_percentage"]
+    record(db, total_attempts=total, passed_attempts=passed, score_sum=score_sum)
+    _add_to_daily(db, buckets)
+    _add_to_exam_stats(db, exams)
+
+def record_certificates(db: Session, certificates: Iterable[Tuple[UUID, datetime]]) -> None:
+    """Count issued certificates, given as (candidate_id, issued_on)"""
+    certificates = list(certificates)
+    if not certificates:
+        return
+    
+    buckets = defaultdict(lambda: {"attempts": 0, "passed_attempts": 0, "score_sum": 0.0, "certificates": 0})
+    institutes = _institutes_of(db, {candidate_id for candidate_id, _ in certificates})
+    for candidate_id, issued_on in certificates:
+        institute_id = institutes.get(candidate_id)
+        if institute_id is not None:
+            buckets[(institute_id, issued_on.date())]["certificates"] += 1
+    record(db, total_certificates=len(certificates))
+    _add_to_daily(db, buckets)
+
+def _institutes_of(db: Session, candidate_ids: Set[UUID]) -> Dict[UUID, UUID]:
+    return dict(
+        db.query(Candidate.user_id, Candidate.institute_id).filter(Candidate.user_id.in_(candidate_ids)).all()
+    )
+
+def _add_to_daily(db: Session, buckets: Dict[Tuple[UUID, date], Dict]) -> None:
+    if not buckets:
+        return
+    statement = upsert(db, InstituteDailyStats).values([
+        dict(institute_id=institute_id, day=day, **totals)
+        for (institute_id, day), totals in buckets.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["institute_id", "day"],
+        set_={
+            **{name: getattr(InstituteDailyStats, name) + statement.excluded[name] for name in DAILY_COUNTERS},
+            "updated_at": func.now(),
+        }
+    ))
+
+def score_bucket(score_percentage: float) -> int:
+    return min(max(int(score_percentage // 10), 0), SCORE_BUCKETS - 1)
+
+def _add_to_exam_stats(db: Session, exams: Dict[UUID, Dict]) -> None:
+    statement = upsert(db, ExamStats).values([
+        dict(exam_id=exam_id, shard=random.randrange(settings.EXAM_STATS_SHARDS), **totals)
+        for exam_id, totals in exams.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["exam_id", "shard"],
+        set_={
+            **{name: getattr(ExamStats, name) + statement.excluded[name] for name in EXAM_COUNTERS},
+            "updated_at": func.now(),
+        }
+    ))
+
+def get_exam_stats(db: Session, exam_id: UUID) -> dict:
+    """Attempts, passes, score sum and score histogram of an exam, summed over its shards"""
+    row = db.query(
+        *(func.coalesce(func.sum(getattr(ExamStats, name)), 0).label(name) for name in EXAM_COUNTERS)
+    ).filter(ExamStats.exam_id == exam_id).one()
+    return row._asdict()
+
+def refresh_exam_stats(db: Session) -> int:
+    """
+    Recompute exam_stats from exam_attempts into shard 0 of each exam; the
+    caller commits. Returns the number of exams written.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection().exec_driver_sql("LOCK TABLE exam_stats IN EXCLUSIVE MODE")
+    
+    db.query(ExamStats).delete(synchronize_session=False)
+    score = ExamAttempt.score_percentage
+    
+    def in_bucket(bucket: int):
+        # The open-ended outer bands match score_bucket's clamping
+        conditions = []
+        if bucket > 0:
+            conditions.append(score >= bucket * 10)
+        if bucket < SCORE_BUCKETS - 1:
+            conditions.append(score < (bucket + 1) * 10)
+        return and_(*conditions)
+    
+    histogram = [func.count(case((in_bucket(bucket), literal(1)))) for bucket in range(SCORE_BUCKETS)]
+    stats = select(
+        ExamAttempt.exam_id,
+        literal(0),
+        func.count(),
+        func.count(case((ExamAttempt.passed == True, literal(1)))),
+        func.sum(score),
+        *histogram,
+    ).group_by(ExamAttempt.exam_id)
+    return db.execute(insert(ExamStats).from_select(
+        ["exam_id", "shard", *EXAM_COUNTERS], stats
+    )).rowcount
+
+def get_totals(db: Session) -> dict:
+    """Counter totals plus when they last changed and were last reconciled"""
+    row = db.query(
+        *(func.coalesce(func.sum(getattr(AnalyticsCounter, name)), 0).label(name) for name in COUNTERS),
+        func.max(AnalyticsCounter.updated_at).label("updated_at"),
+        func.max(AnalyticsCounter.reconciled_at).label("reconciled_at")
+    ).one()
+    return row._asdict()
+
+def reconcile(db: Session) -> Dict[str, tuple]:
+    """
+    Recompute every counter from the base tables into shard 0 and clear the
+    other shards; the caller commits. Returns {counter: (before, after)} for
+    counters that had drifted.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Writers block on the counters until we commit, so none of their rows
+        # is both counted here and added again as a delta
+        db.connection().exec_driver_sql("LOCK TABLE analytics_counters IN EXCLUSIVE MODE")
+    
+    before = get_totals(db)
+    attempts = db.query(
+        func.count(ExamAttempt.id),
+        func.count(ExamAttempt.id).filter(ExamAttempt.passed == True),
+        func.coalesce(func.sum(ExamAttempt.score_percentage), 0.0)
+    ).one()
+    after = {
+        "total_candidates": db.query(func.count(Candidate.user_id)).scalar(),
+        "total_trainers": db.query(func.count(Trainer.user_id)).scalar(),
+        "total_institutes": db.query(func.count(Institute.id)).scalar(),
+        "total_courses": db.query(func.count(Course.id)).scalar(),
+        "total_certificates": db.query(func.count(CourseCertificate.id)).scalar(),
+        "total_attempts": attempts[0],
+        "passed_attempts": attempts[1],
+        "score_sum": float(attempts[2]),
+    }
+    
+    db.query(AnalyticsCounter).delete(synchronize_session=False)
+    db.add(AnalyticsCounter(shard=0, **after, updated_at=func.now(), reconciled_at=func.now()))
+    db.flush()
+    return {
+        name: (before[name], after[name])
+        for name in COUNTERS
+        # score_sum is a float total; ignore rounding noise
+        if abs(before[name] - after[name]) > (1e-6 * max(1.0, abs(after[name])) if name == "score_sum" else 0)
+    }
+
+def refresh_daily(db: Session, since: Optional[date] = None, until: Optional[date] = None) -> int:
+    """
+    Recompute institute_daily_stats for days in ``[since, until]`` (all days
+    when unbounded) from exam_attempts and course_certificates; the caller
+    commits. Returns the number of buckets written.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Block in-transaction bucket updates for the duration, as in reconcile
+        db.connection().exec_driver_sql("LOCK TABLE institute_daily_stats IN EXCLUSIVE MODE")
+    
+    def in_range(column):
+        conditions = []
+        if since is not None:
+            conditions.append(column >= datetime.combine(since, time.min))
+        if until is not None:
+            conditions.append(column < datetime.combine(until + timedelta(days=1), time.min))
+        return conditions
+    
+    stale = db.query(InstituteDailyStats)
+    if since is not None:
+        stale = stale.filter(InstituteDailyStats.day >= since)
+    if until is not None:
+        stale = stale.filter(InstituteDailyStats.day <= until)
+    stale.delete(synchronize_session=False)
+    
+    attempt_rows = select(
+        Candidate.institute_id.label("institute_id"),
+        func.date(ExamAttempt.attempted_on).label("day"),
+        literal(1).label("attempts"),
+        case((ExamAttempt.passed == True, 1), else_=0).label("passed_attempts"),
+        ExamAttempt.score_percentage.label("score_sum"),
+        literal(0).label("certificates"),
+    ).join(Candidate, Candidate.user_id == ExamAttempt.candidate_id).where(
+        Candidate.institute_id.isnot(None), *in_range(ExamAttempt.attempted_on)
+    )
+    certificate_rows = select(
+        Candidate.institute_id,
+        func.date(CourseCertificate.issued_on),
+        literal(0),
+        literal(0),
+        literal(0.0),
+        literal(1),
+    ).join(Candidate, Candidate.user_id == CourseCertificate.candidate_id).where(
+        Candidate.institute_id.isnot(None), *in_range(CourseCertificate.issued_on)
+    )
+    rows = union_all(attempt_rows, certificate_rows).subquery()
+    buckets = select(
+        rows.c.institute_id,
+        rows.c.day,
+        func.sum(rows.c.attempts),
+        func.sum(rows.c.passed_attempts),
+        func.sum(rows.c.score_sum),
+        func.sum(rows.c.certificates),
+    ).group_by(rows.c.institute_id, rows.c.day)
+    return db.execute(insert(InstituteDailyStats).from_select(
+        ["institute_id", "day", *DAILY_COUNTERS], buckets
+    )).rowcount
+
+GEOGRAPHY_LEVELS = {
+    "state": [],
+    "district": [("district", Institute.district)],
+    "block": [("district", Institute.district), ("block", Institute.block)],
+    "institute": [
+        ("district", Institute.district), ("block", Institute.block),
+        ("institute_id", Institute.id), ("institute_name", Institute.name),
+    ],
+}
+
+def get_daily_series(
+    db: Session,
+    start: date,
+    end: date,
+    level: str = "district",
+    district: Optional[str] = None,
+    block: Optional[str] = None,
+    institute_id: Optional[UUID] = None,
+) -> List[Dict]:
+    """Daily buckets in ``[start, end]`` rolled up to ``level``, optionally narrowed to one place"""
+    keys = GEOGRAPHY_LEVELS[level]
+    attempts = func.sum(InstituteDailyStats.attempts)
+    passed = func.sum(InstituteDailyStats.passed_attempts)
+    score_sum = func.sum(InstituteDailyStats.score_sum)
+    query = db.query(
+        InstituteDailyStats.day,
+        *(column.label(name) for name, column in keys),
+        attempts.label("attempts"),
+        passed.label("passed_attempts"),
+        score_sum.label("score_sum"),
+        func.sum(InstituteDailyStats.certificates).label("certificates"),
+    ).join(Institute, Institute.id == InstituteDailyStats.institute_id).filter(
+        InstituteDailyStats.day >= start,
+        InstituteDailyStats.day <= end
+    )
+    if district is not None:
+        query = query.filter(Institute.district == district)
+    if block is not None:
+        query = query.filter(Institute.block == block)
+    if institute_id is not None:
+        query = query.filter(Institute.id == institute_id)
+    group_by = [InstituteDailyStats.day, *(column for _, column in keys)]
+    rows = query.group_by(*group_by).order_by(*group_by).all()
+    
+    series = []
+    for row in rows:
+        item = row._asdict()
+        item["pass_rate"] = (item["passed_attempts"] / item["attempts"] * 100) if item["attempts"] > 0 else 0
+        item["average_score"] = (item.pop("score_sum") / item["attempts"]) if item["attempts"] > 0 else 0
+        series.append(item)
+    return series
@@ -1,84 +1,91 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
-from uuid import uuid4
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from uuid import UUID, uuid4
+import hashlib
+import hmac
 import logging
+import secrets
 
-from backend.models.user import User, Candidate, Trainer
+from backend.core.config import settings
+from backend.core.dependencies import revoke_principal
+from backend.models.user import User, Candidate, Trainer, RefreshToken
 from backend.models.institute import Institute
 from backend.schemas.user import UserCreate, UserInDB
-from backend.core.security import get_password_hash, verify_password
+from backend.services import analytics, password_hasher
+from backend.utils.cache import LRUCache
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Recently failed logins, keyed by (email, keyed digest of the password) and
+# holding the password hash they failed against, so a password change
+# invalidates them. Repeats of the same wrong password skip bcrypt.
+_failed_logins = LRUCache(
+    max_entries=settings.LOGIN_FAILURE_CACHE_MAX_ENTRIES,
+    ttl=settings.LOGIN_FAILURE_CACHE_TTL_SECONDS,
+)
+
+def _failure_key(email: str, password: str) -> tuple:
+    # Never keep the plain password around, even in memory
+    digest = hmac.new(settings.SECRET_KEY.encode(), password.encode(), hashlib.sha256).digest()
+    return (email, digest)
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    return (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def _create_user(db: Session, user_data: UserCreate, hashed_password: str) -> UserInDB:
+    db_user = User(
+        id=uuid4(),
+        email=user_data.email,
+        hashed_password=hashed_password,
+        role=user_data.role,
+        aadhaar_id=user_data.aadhaar_id,
+        full_name=user_data.full_name
+    )
+    db.add(db_user)
+    db.flush()  # Flush to get the user ID without committing
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    # Create role-specific profile
+    if user_data.role == "candidate":
+        db.add(Candidate(
+            user_id=db_user.id,
+            institute_id=user_data.institute_id,
+            is_ekyc_verified=False
+        ))
+        analytics.record(db, total_candidates=1)
+    elif user_data.role == "trainer":
+        db.add(Trainer(
+            user_id=db_user.id,
+            institute_id=user_data.institute_id
+        ))
+        analytics.record(db, total_trainers=1)
 
-def get_user_by_email(db: Session, email: str) -> User:
-    return db.query(User).filter(User.email == email).first()
+    db.commit()
+    db.refresh(db_user)
+    return UserInDB.from_orm(db_user)
 
-def register_user(db: Session, user_data: UserCreate) -> UserInDB:
-    logger.debug(f"Attempting to register user with data: {user_data.dict()}")
-    
+async def register_user(db: AsyncSession, user_data: UserCreate) -> UserInDB:
     # Check if institute exists for candidates and trainers
     if user_data.role in ["candidate", "trainer"]:
-        logger.debug(f"Checking institute with ID: {user_data.institute_id}")
-        institute = db.query(Institute).filter(Institute.id == user_data.institute_id).first()
+        institute = await db.get(Institute, user_data.institute_id) if user_data.institute_id else None
         if not institute:
             logger.error(f"Institute not found with ID: {user_data.institute_id}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Institute not found"
             )
-        logger.debug(f"Found institute: {institute.name}")
+
+    hashed_password = await password_hasher.hash_password(user_data.password)
 
     # Create user
     try:
-        db_user = User(
-            id=uuid4(),
-            email=user_data.email,
-            hashed_password=get_password_hash(user_data.password),
-            role=user_data.role,
-            aadhaar_id=user_data.aadhaar_id,
-            full_name=user_data.full_name
-        )
-        logger.debug("Created user object")
-        
-        db.add(db_user)
-        db.flush()  # Flush to get the user ID without committing
-        logger.debug(f"Flushed user with ID: {db_user.id}")
-
-        # Create role-specific profile
-        if user_data.role == "candidate":
-            logger.debug("Creating candidate profile")
-            candidate = Candidate(
-                user_id=db_user.id,
-                institute_id=user_data.institute_id,
-                is_ekyc_verified=False
-            )
-            db.add(candidate)
-        elif user_data.role == "trainer":
-            logger.debug("Creating trainer profile")
-            trainer = Trainer(
-                user_id=db_user.id,
-                institute_id=user_data.institute_id
-            )
-            db.add(trainer)
-
-        db.commit()
-        db.refresh(db_user)
-        logger.debug("Successfully committed and refreshed user")
-        return UserInDB.from_orm(db_user)
+        return await db.run_sync(_create_user, user_data, hashed_password)
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Integrity error during registration: {str(e)}")
         if "duplicate key value violates unique constraint" in str(e):
             raise HTTPException(
@@ -90,20 +97,161 @@ def register_user(db: Session, user_data: UserCreate) -> UserInDB:
             detail=f"Registration failed: {str(e)}"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error during registration: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Registration failed: {str(e)}"
         )
 
-def authenticate_user(db: Session, email: str, password: str) -> User:
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    key = _failure_key(email, password)
+    if _failed_logins.get(key) == user.hashed_password:
+        return None
+    if not await password_hasher.verify_password(password, user.hashed_password):
+        _failed_logins.set(key, user.hashed_password)
         return None
     return user
 
-def is_first_admin(db: Session) -> bool:
-    return db.query(User).filter(User.role == "admin").first() is None
+def _hash_refresh_token(token: str) -> str:
+    # Tokens carry 256 random bits, so a plain digest is safe to store and index
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _add_refresh_token(db: AsyncSession, user_id: UUID, family_id: UUID, now: datetime) -> str:
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        family_id=family_id,
+        token_hash=_hash_refresh_token(token),
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+async def issue_refresh_token(db: AsyncSession, user_id: UUID) -> str:
+    """Start a new refresh token family for a fresh login"""
+    token = _add_refresh_token(db, user_id, uuid4(), datetime.now(timezone.utc))
+    await db.commit()
+    return token
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Tuple[User, str]:
+    """Exchange a refresh token for its successor; returns the user and the new token"""
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    now = datetime.now(timezone.utc)
+    token_hash = _hash_refresh_token(token)
+
+    # Revoke it in the same statement that checks it, so of two concurrent
+    # refreshes with one token only one gets a successor
+    claimed = (await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now
+        )
+        .values(revoked_at=now)
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if claimed is None:
+        presented = await _find_refresh_token(db, token_hash)
+        if presented is None or presented.revoked_at is None:
+            raise invalid  # unknown or expired
+        if await _in_grace_window(db, presented, now):
+            # The loser of a refresh race: the token was rotated moments ago and
+            # its successor is still live, so this is the same client, not a thief
+            claimed = presented
+        else:
+            # An already rotated token came back: someone else holds a copy
+            logger.warning(f"Refresh token reuse detected, revoking family {presented.family_id}")
+            await _revoke_family(db, presented, now)
+            raise invalid
+
+    user = await db.get(User, claimed.user_id)
+    if not user:
+        await db.rollback()
+        raise invalid
+    new_token = _add_refresh_token(db, user.id, claimed.family_id, now)
+    await db.commit()
+    return user, new_token
+
+async def _find_refresh_token(db: AsyncSession, token_hash: str):
+    return (await db.execute(
+        select(RefreshToken.user_id, RefreshToken.family_id, RefreshToken.revoked_at, User.email)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == token_hash)
+    )).first()
+
+async def _in_grace_window(db: AsyncSession, presented, now: datetime) -> bool:
+    revoked_at = presented.revoked_at
+    if revoked_at.tzinfo is None:
+        revoked_at = revoked_at.replace(tzinfo=timezone.utc)
+    if now - revoked_at > timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS):
+        return False
+    # After a logout or a reuse revocation the family has no live token left
+    return (await db.execute(
+        select(RefreshToken.id).where(
+            RefreshToken.family_id == presented.family_id,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now
+        ).limit(1)
+    )).first() is not None
+
+async def _revoke_family(db: AsyncSession, presented, now: datetime) -> None:
+    """
+    Revoke every live token of a family and every access token the user
+    holds, and commit; the user's next request re-reads their account
+    """
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == presented.family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    # Access tokens are stateless, so they are cut off by issue time; this
+    # also signs the user out of their other sessions' access tokens
+    await db.execute(
+        update(User)
+        .where(User.id == presented.user_id)
+        .values(tokens_valid_after=now)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    revoke_principal(presented.email)
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> None:
+    """Log out: revoke the token and every token rotated from the same login"""
+    presented = await _find_refresh_token(db, _hash_refresh_token(token))
+    if presented is not None:
+        await _revoke_family(db, presented, datetime.now(timezone.utc))
+
+def purge_expired_refresh_tokens(db: Session, batch_size: int = 10000) -> int:
+    """
+    Delete refresh tokens past their expiry, revoked or not, committing per batch.
+
+    An expired token is refused whatever its row says, so nothing (reuse
+    detection included) needs it any more.
+    """
+    now = datetime.now(timezone.utc)
+    purged = 0
+    while True:
+        expired = select(RefreshToken.id).where(RefreshToken.expires_at <= now).limit(batch_size)
+        deleted = db.execute(
+            delete(RefreshToken).where(RefreshToken.id.in_(expired)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        purged += deleted
+        if deleted < batch_size:
+            return purged
+
+async def is_first_admin(db: AsyncSession) -> bool:
+    return (await db.execute(select(User.id).where(User.role == "admin").limit(1))).first() is None
+
+def failed_login_cache_stats() -> dict:
+    return _failed_logins.stats()
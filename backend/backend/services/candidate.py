@@ -1,205 +1,111 @@
-from fastapi import HTTPException, status
+"""
+Candidate-facing operations, on the async session.
+
+Queries specific to candidates are awaited directly. Shared helpers from the
+catalog, question bank, progress and certificate services are written
+against a sync Session, so they run through ``AsyncSession.run_sync``: their
+queries still go over the asyncio driver, and the event loop is free while
+they wait on the database.
+"""
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from typing import List, Dict
 from uuid import UUID, uuid4
-import csv
 import io
 import requests
 from datetime import datetime
-from pathlib import Path
 
-from backend.models.user import User, Candidate, Trainer
-from backend.models.course import Course, Subject
+from backend.models.user import User, Candidate
 from backend.models.exam import Exam, ExamAttempt, CourseCertificate
 from backend.schemas.exam import (
     ExamAttemptCreate, ExamAttemptInDB, ExamInDB,
     ExamSubmission, ExamResult, ExamQuestion
 )
-from backend.schemas.course import CourseCertificateInDB, CourseInDB
-from backend.utils.file_utils import get_file_path
+from backend.schemas.course import CourseCertificateInDB
+from backend.services import certificate as certificate_service
+from backend.services import certificate_renderer
+from backend.services import analytics, catalog, grading, progress, question_bank, submission_queue
 
-def get_available_courses(db: Session) -> List[Dict]:
-    courses = db.query(Course).all()
-    return [CourseInDB.from_orm(course).dict() for course in courses]
+async def get_available_courses(db: AsyncSession, version: str) -> bytes:
+    """Serialized course list for catalog ``version``"""
+    return await db.run_sync(catalog.get_courses_json, version)
 
-def get_available_exams(db: Session, user_id: UUID) -> List[ExamInDB]:
+async def get_available_exams(db: AsyncSession, user_id: UUID) -> List[ExamInDB]:
     """Get all available exams for a candidate"""
     # Get candidate's institute
-    candidate = db.query(Candidate).filter(Candidate.user_id == user_id).first()
-    if not candidate:
+    institute_id = await db.scalar(select(Candidate.institute_id).where(Candidate.user_id == user_id))
+    if institute_id is None:
         return []
     
-    # Get all trainers in the same institute
-    trainer_ids = [
-        t[0] for t in 
-        db.query(Trainer.user_id).filter(Trainer.institute_id == candidate.institute_id).all()
-    ]
-    
-    # Get all exams for subjects taught by these trainers
-    exams = db.query(Exam).join(Subject).filter(
-        Subject.trainer_id.in_(trainer_ids)
-    ).all()
-    
-    return [ExamInDB.from_orm(exam) for exam in exams]
+    # Exams carry their subject's institute, so this is one index scan (or a cache hit)
+    return await db.run_sync(catalog.get_institute_exams, institute_id)
+
+async def _get_exam(db: AsyncSession, exam_id: UUID) -> Exam:
+    exam = await db.get(Exam, exam_id)
+    if not exam or not exam.csv_url:
+        raise HTTPException(status_code=404, detail="Exam or questions not found")
+    return exam
 
-def get_exam_questions(
-    db: Session, 
+async def get_exam_questions(
+    db: AsyncSession, 
     exam_id: UUID, 
     page: int = 1, 
     page_size: int = 10
 ) -> Dict:
     """Get paginated questions for an exam without correct answers"""
-    exam = db.query(Exam).filter(Exam.id == exam_id).first()
-    if not exam or not exam.csv_url:
-        raise HTTPException(status_code=404, detail="Exam or questions not found")
+    exam = await _get_exam(db, exam_id)
+    
+    # Calculate pagination
+    total = await db.run_sync(question_bank.get_question_count, exam)
+    total_pages = (total + page_size - 1) // page_size if total > 0 else 0
+    page = min(page, total_pages) if total_pages > 0 else 0
     
-    try:
-        # Get the full file path
-        file_path = get_file_path(exam.csv_url)
-        print(f"DEBUG: Attempting to open file at: {file_path}")
-        print(f"DEBUG: File exists? {file_path.exists()}")
-        
-        # Backup approach if file doesn't exist at the exact path
-        if not file_path.exists():
-            # Try direct path in uploads/exams
-            alternate_path = Path(f"uploads/exams/{exam_id}/{exam.csv_url.split('/')[-1]}")
-            print(f"DEBUG: Attempting alternate path: {alternate_path}")
-            print(f"DEBUG: Alternate exists? {alternate_path.exists()}")
-            
-            if alternate_path.exists():
-                file_path = alternate_path
-        
-        if not file_path.exists():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Exam CSV file not found at {file_path}"
-            )
-        
-        # Read and parse CSV
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            all_questions = []
-            for row in reader:
-                # Skip empty rows
-                if not row.get('question') or not row.get('correct_answer'):
-                    continue
-                    
-                all_questions.append({
-                    'question': row['question'],
-                    'option_a': row['option_a'],
-                    'option_b': row['option_b'],
-                    'option_c': row['option_c'],
-                    'option_d': row['option_d']
-                })
-            
-            # Calculate pagination
-            total = len(all_questions)
-            total_pages = (total + page_size - 1) // page_size if total > 0 else 0
-            page = min(page, total_pages) if total_pages > 0 else 0
-            
-            # Get paginated questions
-            start_idx = (page - 1) * page_size if page > 0 else 0
-            end_idx = start_idx + page_size
-            paginated_questions = all_questions[start_idx:end_idx]
-            
-            print(f"DEBUG: Found {total} questions in CSV")
-            
-            return {
-                'questions': paginated_questions,
-                'total': total,
-                'page': page,
-                'page_size': page_size,
-                'total_pages': total_pages
-            }
-    except Exception as e:
-        import traceback
-        print(f"DEBUG: Error reading exam questions: {str(e)}")
-        print(f"DEBUG: Traceback: {traceback.format_exc()}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error reading exam questions: {str(e)}"
-        )
+    # Get paginated questions
+    start_idx = (page - 1) * page_size if page > 0 else 0
+    end_idx = start_idx + page_size
+    paginated_questions = await db.run_sync(question_bank.get_question_page, exam, start_idx, end_idx)
+    
+    return {
+        'questions': paginated_questions,
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'total_pages': total_pages
+    }
 
-def get_exam_questions_with_answers(db: Session, exam_id: UUID) -> List[ExamQuestion]:
+async def get_exam_questions_with_answers(db: AsyncSession, exam_id: UUID) -> List[ExamQuestion]:
     """Get all questions for an exam with correct answers (for submission)"""
-    exam = db.query(Exam).filter(Exam.id == exam_id).first()
-    if not exam or not exam.csv_url:
-        raise HTTPException(status_code=404, detail="Exam or questions not found")
+    exam = await _get_exam(db, exam_id)
     
-    try:
-        # Get the full file path
-        file_path = get_file_path(exam.csv_url)
-        print(f"DEBUG: Attempting to open file at: {file_path}")
-        print(f"DEBUG: File exists? {file_path.exists()}")
-        
-        # Backup approach if file doesn't exist at the exact path
-        if not file_path.exists():
-            # Try direct path in uploads/exams
-            alternate_path = Path(f"uploads/exams/{exam_id}/{exam.csv_url.split('/')[-1]}")
-            print(f"DEBUG: Attempting alternate path: {alternate_path}")
-            print(f"DEBUG: Alternate exists? {alternate_path.exists()}")
-            
-            if alternate_path.exists():
-                file_path = alternate_path
-        
-        if not file_path.exists():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Exam CSV file not found at {file_path}"
-            )
-        
-        # Read and parse CSV
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            questions = []
-            for row in reader:
-                # Skip empty rows
-                if not row.get('question') or not row.get('correct_answer'):
-                    continue
-                    
-                questions.append(ExamQuestion(
-                    question=row['question'],
-                    option_a=row['option_a'],
-                    option_b=row['option_b'],
-                    option_c=row['option_c'],
-                    option_d=row['option_d'],
-                    correct_answer=row['correct_answer'].lower()  # Ensure lowercase
-                ))
-            
-            print(f"DEBUG: Found {len(questions)} questions in CSV for submission")
-            return questions
-    except Exception as e:
-        import traceback
-        print(f"DEBUG: Error reading exam questions with answers: {str(e)}")
-        print(f"DEBUG: Traceback: {traceback.format_exc()}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error reading exam questions: {str(e)}"
-        )
+    return [
+        ExamQuestion(**question, correct_answer=correct_answer)
+        for question, correct_answer in await db.run_sync(question_bank.get_questions_with_answers, exam)
+    ]
+
+async def get_exam_bundle(db: AsyncSession, exam_id: UUID, gzipped: bool = True) -> bytes:
+    """Get every question of an exam (without answers) as JSON, gzip-compressed by default"""
+    exam = await _get_exam(db, exam_id)
+    return await db.run_sync(question_bank.get_exam_bundle, exam, gzipped)
+
+async def get_exam_answer_key(db: AsyncSession, exam_id: UUID) -> bytes:
+    """Get the answer key for an exam, one option letter byte per question"""
+    exam = await _get_exam(db, exam_id)
+    return await db.run_sync(question_bank.get_answer_key, exam)
 
-def submit_exam(db: Session, submission: ExamSubmission, user_id: UUID) -> ExamResult:
+async def submit_exam(db: AsyncSession, submission: ExamSubmission, user_id: UUID) -> ExamResult:
     """Submit an exam attempt and calculate score"""
-    # Get exam questions with answers
-    questions = get_exam_questions_with_answers(db, submission.exam_id)
-    
-    # Validate answers
-    total_questions = len(questions)
-    correct_answers = 0
-    
-    for i, question in enumerate(questions):
-        question_id = str(i)  # Using index as question ID
-        if question_id in submission.answers:
-            user_answer = submission.answers[question_id].lower()
-            if user_answer == question.correct_answer:
-                correct_answers += 1
-    
-    # Calculate score
-    score_percentage = (correct_answers / total_questions) * 100
-    passed = score_percentage >= 40  # Passing threshold
+    # Grade against the exam's answer key (question index is the question ID)
+    answer_key = await get_exam_answer_key(db, submission.exam_id)
+    result = grading.grade(
+        answer_key, grading.encode_submission(submission.answers, len(answer_key))
+    )
+    score_percentage = result.score_percentage
+    passed = result.passed
     
     # Create exam attempt
-    attempt = ExamAttempt(
+    attempt = dict(
         id=uuid4(),
         candidate_id=user_id,
         exam_id=submission.exam_id,
@@ -208,94 +114,52 @@ def submit_exam(db: Session, submission: ExamSubmission, user_id: UUID) -> ExamR
         answers=submission.answers,  # Store the answers
         attempted_on=datetime.utcnow()
     )
-    db.add(attempt)
-    db.commit()
-    db.refresh(attempt)
-    
-    # Check for course certificate
-    check_course_certificate(db, submission.exam_id, user_id)
+    if submission_queue.is_enabled():
+        # Journaled now; inserted and certificate-checked by the background flusher
+        submission_queue.enqueue(attempt)
+    else:
+        await db.run_sync(_record_attempt, attempt)
     
     return ExamResult(
         exam_id=submission.exam_id,
         score_percentage=score_percentage,
         passed=passed,
-        total_questions=total_questions,
-        correct_answers=correct_answers,
-        attempted_on=attempt.attempted_on
+        total_questions=result.total,
+        correct_answers=result.correct,
+        attempted_on=attempt["attempted_on"]
     )
 
-def get_exam_attempts(db: Session, user_id: UUID) -> List[ExamAttemptInDB]:
+def _record_attempt(db: Session, attempt: dict) -> None:
+    db.add(ExamAttempt(**attempt))
+    analytics.record_attempts(db, [attempt])
+    db.commit()
+    
+    # Update course progress and check for course certificate
+    if attempt["passed"]:
+        check_course_certificate(db, attempt["exam_id"], attempt["candidate_id"])
+
+async def get_exam_attempts(db: AsyncSession, user_id: UUID) -> List[ExamAttemptInDB]:
     """Get all exam attempts for a candidate"""
-    attempts = db.query(ExamAttempt).filter(ExamAttempt.candidate_id == user_id).all()
+    attempts = await db.scalars(select(ExamAttempt).where(ExamAttempt.candidate_id == user_id))
     return [ExamAttemptInDB.from_orm(attempt) for attempt in attempts]
 
-def get_certificates(db: Session, candidate_id: UUID) -> List[CourseCertificateInDB]:
+async def get_certificates(db: AsyncSession, candidate_id: UUID) -> List[CourseCertificateInDB]:
     """Get all certificates for a candidate"""
-    certificates = db.query(CourseCertificate).filter(
+    certificates = await db.scalars(select(CourseCertificate).where(
         CourseCertificate.candidate_id == candidate_id
-    ).all()
+    ))
     return [CourseCertificateInDB.from_orm(cert) for cert in certificates]
 
-def get_candidate_progress(db: Session, candidate_id: UUID) -> dict:
-    # Get candidate's institute
-    candidate = db.query(Candidate).filter(Candidate.user_id == candidate_id).first()
-    if not candidate:
+async def get_candidate_progress(db: AsyncSession, candidate_id: UUID) -> dict:
+    summary = await db.run_sync(progress.get_candidate_summary, candidate_id)
+    if summary is None:
         raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    # Get total courses and subjects
-    total_courses = db.query(Course).count()
-    total_subjects = db.query(Subject).count()
-    
-    # Get completed subjects
-    completed_subjects = db.query(ExamAttempt).filter(
-        ExamAttempt.candidate_id == candidate_id,
-        ExamAttempt.passed == True
-    ).count()
-    
-    # Get earned certificates
-    earned_certificates = db.query(CourseCertificate).filter(
-        CourseCertificate.candidate_id == candidate_id
-    ).count()
-    
-    return {
-        "total_courses": total_courses,
-        "total_subjects": total_subjects,
-        "completed_subjects": completed_subjects,
-        "earned_certificates": earned_certificates,
-        "completion_percentage": (completed_subjects / total_subjects * 100) if total_subjects > 0 else 0
-    }
+    return summary
 
 def check_course_certificate(db: Session, exam_id: UUID, candidate_id: UUID) -> None:
-    # Get the course for this exam
-    exam = db.query(Exam).join(Subject).filter(Exam.id == exam_id).first()
-    if not exam:
-        return
-    
-    course_id = exam.subject.course_id
-    
-    # Check if candidate has passed all subjects in the course
-    total_subjects = db.query(Subject).filter(Subject.course_id == course_id).count()
-    passed_subjects = db.query(ExamAttempt).join(Exam).join(Subject).filter(
-        ExamAttempt.candidate_id == candidate_id,
-        ExamAttempt.passed == True,
-        Subject.course_id == course_id
-    ).count()
-    
-    # If all subjects passed and certificate not already issued
-    if passed_subjects == total_subjects:
-        existing_certificate = db.query(CourseCertificate).filter(
-            CourseCertificate.candidate_id == candidate_id,
-            CourseCertificate.course_id == course_id
-        ).first()
-        
-        if not existing_certificate:
-            # TODO: Generate certificate (PDF) and store it
-            certificate_url = f"certificates/{candidate_id}/{course_id}.pdf"
-            
-            certificate = CourseCertificate(
-                candidate_id=candidate_id,
-                course_id=course_id,
-                certificate_url=certificate_url
-            )
-            db.add(certificate)
-            db.commit() 
\ No newline at end of file
+    """Record a passed exam and issue the course certificate if it completes the course"""
+    issued = certificate_service.evaluate_passed_exams(db, [(candidate_id, exam_id)])
+    certificate_ids = [certificate.id for certificate in issued]
+    db.commit()
+    progress.invalidate_candidates([candidate_id])
+    certificate_renderer.enqueue(certificate_ids)
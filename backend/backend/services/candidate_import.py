@@ -0,0 +1,269 @@
+"""
+Bulk candidate registration from CSV.
+
+Rows are validated as they are read and handled a batch at a time: each
+batch is checked for duplicate emails and Aadhaar IDs, against earlier rows
+of the file and against ``users`` with a few IN queries, its passwords are
+bcrypt-hashed, and it is written as multi-row INSERTs before the next batch
+is read. Only one batch of plaintext passwords is ever held in memory.
+
+Hashing runs on one small process pool shared by every import in this
+worker, so imports cannot take the cores that sign-ins need. Every rejected
+row is reported with its line number.
+"""
+from fastapi import HTTPException, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO
+from uuid import UUID, uuid4
+import csv
+import io
+import logging
+import multiprocessing
+import os
+import threading
+
+from backend.core.config import settings
+from backend.core.security import get_password_hash
+from backend.models.institute import Institute
+from backend.models.user import User, Candidate
+from backend.schemas.user import CandidateImportError, CandidateImportResult, UserCreate
+from backend.services import analytics
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ["email", "full_name", "aadhaar_id", "password"]
+
+# Rows per IN (...) when checking emails and Aadhaar IDs against users
+_LOOKUP_CHUNK = 1000
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _hash_workers() -> int:
+    # Leave most cores to request handling and the sign-in hashing pool; the
+    # quarter is shared by every app worker on the host
+    return settings.CANDIDATE_IMPORT_HASH_WORKERS or max(1, (os.cpu_count() or 1) // 4 // settings.WEB_CONCURRENCY)
+
+
+def _hash_pool() -> ProcessPoolExecutor:
+    """The worker-wide hashing pool, started on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=_hash_workers(), mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def stop() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+@dataclass
+class _Row:
+    line: int
+    user: UserCreate
+
+
+def _error(line: int, email: Optional[str], error: str) -> CandidateImportError:
+    return CandidateImportError(line=line, email=email or None, error=error)
+
+
+def _validation_message(e: ValidationError) -> str:
+    first = e.errors()[0]
+    field = ".".join(str(part) for part in first["loc"])
+    return f"{field}: {first['msg']}" if field else first["msg"]
+
+
+def _iter_valid_rows(
+    f: TextIO,
+    default_institute_id: Optional[UUID],
+    errors: List[CandidateImportError]
+) -> Iterator[_Row]:
+    """Parse and validate rows as they are read, recording the invalid ones in ``errors``"""
+    reader = csv.DictReader(f)
+    if not all(field in (reader.fieldnames or []) for field in REQUIRED_FIELDS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid CSV format. Required fields: {', '.join(REQUIRED_FIELDS)} (optional: institute_id)"
+        )
+    for count, row in enumerate(reader, start=1):
+        if count > settings.CANDIDATE_IMPORT_MAX_ROWS:
+            # Earlier batches are already committed, so report rather than fail
+            errors.append(_error(
+                reader.line_num, None,
+                f"At most {settings.CANDIDATE_IMPORT_MAX_ROWS} candidates per import; this and later rows were not imported"
+            ))
+            return
+        email = (row.get("email") or "").strip()
+        try:
+            user = UserCreate(
+                email=email,
+                full_name=(row.get("full_name") or "").strip(),
+                aadhaar_id=(row.get("aadhaar_id") or "").strip(),
+                password=row.get("password") or "",
+                role="candidate",
+                institute_id=(row.get("institute_id") or "").strip() or default_institute_id
+            )
+        except ValidationError as e:
+            errors.append(_error(reader.line_num, email, _validation_message(e)))
+            continue
+        if not user.full_name or not user.password:
+            errors.append(_error(reader.line_num, email, "full_name and password are required"))
+            continue
+        yield _Row(line=reader.line_num, user=user)
+
+
+def _existing(db: Session, column, values: Set[str]) -> Set[str]:
+    found = set()
+    values = list(values)
+    for start in range(0, len(values), _LOOKUP_CHUNK):
+        found.update(db.scalars(select(column).where(column.in_(values[start:start + _LOOKUP_CHUNK]))))
+    return found
+
+
+def _check_uniqueness(
+    db: Session,
+    rows: List[_Row],
+    seen_emails: Dict[str, int],
+    seen_aadhaar: Dict[str, int],
+    errors: List[CandidateImportError]
+) -> List[_Row]:
+    """
+    Drop rows whose email or Aadhaar ID is already registered or repeats an
+    earlier row of the file; ``seen_*`` map the file's accepted values to
+    their line and carry over from batch to batch
+    """
+    taken_emails = _existing(db, User.email, {row.user.email for row in rows})
+    taken_aadhaar = _existing(db, User.aadhaar_id, {row.user.aadhaar_id for row in rows})
+    institutes = set(db.scalars(select(Institute.id).where(
+        Institute.id.in_({row.user.institute_id for row in rows})
+    )))
+
+    unique = []
+    for row in rows:
+        user = row.user
+        if user.email in taken_emails:
+            errors.append(_error(row.line, user.email, "Email already registered"))
+        elif user.aadhaar_id in taken_aadhaar:
+            errors.append(_error(row.line, user.email, "Aadhaar ID already registered"))
+        elif user.email in seen_emails:
+            errors.append(_error(row.line, user.email, f"Duplicate email (first on line {seen_emails[user.email]})"))
+        elif user.aadhaar_id in seen_aadhaar:
+            errors.append(_error(row.line, user.email, f"Duplicate Aadhaar ID (first on line {seen_aadhaar[user.aadhaar_id]})"))
+        elif user.institute_id not in institutes:
+            errors.append(_error(row.line, user.email, "Institute not found"))
+        else:
+            seen_emails[user.email] = row.line
+            seen_aadhaar[user.aadhaar_id] = row.line
+            unique.append(row)
+    return unique
+
+
+def _insert_batch(db: Session, batch: List[_Row], hashes: List[str]) -> None:
+    users = []
+    candidates = []
+    for row, hashed_password in zip(batch, hashes):
+        user_id = uuid4()
+        users.append({
+            "id": user_id,
+            "email": row.user.email,
+            "hashed_password": hashed_password,
+            "role": "candidate",
+            "aadhaar_id": row.user.aadhaar_id,
+            "full_name": row.user.full_name
+        })
+        candidates.append({
+            "user_id": user_id,
+            "institute_id": row.user.institute_id,
+            "is_ekyc_verified": False
+        })
+    db.execute(insert(User), users)
+    db.execute(insert(Candidate), candidates)
+    analytics.record(db, total_candidates=len(users))
+
+
+def _write(db: Session, batch: List[_Row], hashes: List[str], errors: List[CandidateImportError]) -> int:
+    """Insert and commit one batch; returns how many rows were written"""
+    try:
+        _insert_batch(db, batch, hashes)
+        db.commit()
+        return len(batch)
+    except IntegrityError:
+        # Someone registered one of these since the pre-check; retry row by
+        # row so only the conflicting rows are rejected
+        db.rollback()
+
+    written = 0
+    for row, hashed_password in zip(batch, hashes):
+        try:
+            _insert_batch(db, [row], [hashed_password])
+            db.commit()
+            written += 1
+        except IntegrityError:
+            db.rollback()
+            errors.append(_error(row.line, row.user.email, "Email or Aadhaar ID already registered"))
+    return written
+
+
+def _batches(rows: Iterable[_Row], size: int) -> Iterator[List[_Row]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def import_candidates(db: Session, f: TextIO, default_institute_id: Optional[UUID] = None) -> CandidateImportResult:
+    """Register every valid candidate in CSV ``f``.
+
+    Columns: email, full_name, aadhaar_id, password and optionally
+    institute_id, which falls back to ``default_institute_id``. Batches
+    commit independently, so a failure part-way keeps the batches before it,
+    and rows past ``CANDIDATE_IMPORT_MAX_ROWS`` are reported, not imported.
+    """
+    errors: List[CandidateImportError] = []
+    seen_emails: Dict[str, int] = {}
+    seen_aadhaar: Dict[str, int] = {}
+    executor = _hash_pool()
+
+    imported = 0
+    for batch in _batches(_iter_valid_rows(f, default_institute_id, errors), settings.CANDIDATE_IMPORT_BATCH_SIZE):
+        batch = _check_uniqueness(db, batch, seen_emails, seen_aadhaar, errors)
+        if not batch:
+            continue
+        hashes = list(executor.map(
+            get_password_hash,
+            [row.user.password for row in batch],
+            chunksize=max(1, len(batch) // (_hash_workers() * 4))
+        ))
+        imported += _write(db, batch, hashes, errors)
+
+    errors.sort(key=lambda error: error.line)
+    logger.info(f"Imported {imported} candidates, rejected {len(errors)}")
+    return CandidateImportResult(imported=imported, rejected=len(errors), errors=errors)
+
+
+async def import_candidates_upload(
+    db: Session,
+    file: UploadFile,
+    default_institute_id: Optional[UUID] = None
+) -> CandidateImportResult:
+    """Import an uploaded candidate CSV off the event loop"""
+    # The upload is spooled to disk by Starlette; decode and parse it lazily
+    f = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await run_in_threadpool(import_candidates, db, f, default_institute_id)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV must be UTF-8 encoded")
+    finally:
+        f.detach()
@@ -0,0 +1,91 @@
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+from typing import Callable, List
+from uuid import UUID
+
+from backend.core.config import settings
+from backend.models.course import Course, Subject
+from backend.models.exam import Exam
+from backend.schemas.course import CourseInDB, CourseWithSubjects
+from backend.schemas.exam import ExamInDB
+from backend.utils.cache import LRUCache
+
+# Courses and subjects are only ever added, so their counts and newest
+# created_at identify a catalog state. The version is re-read from the
+# database at most once per TTL; a change made in this worker forgets it at once.
+_versions = LRUCache(max_entries=1, ttl=settings.CATALOG_VERSION_CACHE_TTL_SECONDS)
+
+# Serialized JSON bodies of the catalog endpoints, keyed by (version, view)
+_payloads = LRUCache(max_entries=8)
+
+# Exams offered at each institute; the TTL bounds staleness across workers
+_institute_exams = LRUCache(
+    max_entries=settings.INSTITUTE_EXAMS_CACHE_MAX_ENTRIES,
+    ttl=settings.INSTITUTE_EXAMS_CACHE_TTL_SECONDS,
+)
+
+_course_list = TypeAdapter(List[CourseInDB])
+_course_with_subjects_list = TypeAdapter(List[CourseWithSubjects])
+
+def get_catalog_version(db: Session) -> str:
+    """Version tag of the course catalog, cached briefly so most reads skip the query"""
+    version = _versions.get("catalog")
+    if version is None:
+        row = db.execute(select(
+            select(func.count(Course.id)).scalar_subquery(),
+            select(func.max(Course.created_at)).scalar_subquery(),
+            select(func.count(Subject.id)).scalar_subquery(),
+            select(func.max(Subject.created_at)).scalar_subquery(),
+        )).one()
+        version = ":".join(
+            value.isoformat() if hasattr(value, "isoformat") else str(value or "") for value in row
+        )
+        _versions.set("catalog", version)
+    return version
+
+def bump_catalog_version() -> None:
+    """Forget the cached catalog version and bodies after a catalog change in this worker"""
+    _versions.clear()
+    _payloads.clear()
+
+def _payload(version: str, view: str, build: Callable[[], bytes]) -> bytes:
+    key = (version, view)
+    body = _payloads.get(key)
+    if body is None:
+        body = build()
+        _payloads.set(key, body)
+    return body
+
+def get_courses_json(db: Session, version: str) -> bytes:
+    """JSON list of every course (CourseInDB) for catalog ``version``"""
+    return _payload(version, "courses", lambda: _course_list.dump_json(
+        [CourseInDB.from_orm(course) for course in db.query(Course).all()]
+    ))
+
+def get_courses_with_subjects_json(db: Session, version: str) -> bytes:
+    """JSON list of every course with its subjects (CourseWithSubjects) for catalog ``version``"""
+    return _payload(version, "courses_with_subjects", lambda: _course_with_subjects_list.dump_json(
+        [
+            CourseWithSubjects.from_orm(course)
+            for course in db.query(Course).options(selectinload(Course.subjects)).all()
+        ]
+    ))
+
+def get_institute_exams(db: Session, institute_id: UUID) -> List[ExamInDB]:
+    """Exams of subjects taught at an institute, via the indexed exams.institute_id"""
+    exams = _institute_exams.get(institute_id)
+    if exams is None:
+        exams = [
+            ExamInDB.from_orm(exam)
+            for exam in db.query(Exam).filter(Exam.institute_id == institute_id).all()
+        ]
+        _institute_exams.set(institute_id, exams)
+    return exams
+
+def invalidate_institute_exams(institute_id: UUID) -> None:
+    """Forget an institute's cached exam list after an exam is added or changed in this worker"""
+    _institute_exams.pop(institute_id)
+
+def cache_stats() -> dict:
+    return {"payloads": _payloads.stats(), "institute_exams": _institute_exams.stats()}
@@ -0,0 +1,55 @@
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+
+from backend.models.exam import CourseCertificate
+from backend.services import analytics, progress
+
+def evaluate_course_certificate(
+    db: Session, candidate_id: UUID, course_id: UUID
+) -> Optional[CourseCertificate]:
+    """Issue a certificate if the candidate has passed every subject of the course; the caller commits"""
+    if not progress.is_course_complete(db, candidate_id, course_id):
+        return None
+    return _issue_certificate(db, candidate_id, course_id)
+
+def _issue_certificate(
+    db: Session, candidate_id: UUID, course_id: UUID
+) -> Optional[CourseCertificate]:
+    existing_certificate = db.query(CourseCertificate).filter(
+        CourseCertificate.candidate_id == candidate_id,
+        CourseCertificate.course_id == course_id
+    ).first()
+    if existing_certificate:
+        return None
+    
+    # The PDF is written here by certificate_renderer once the caller commits
+    certificate_url = f"certificates/{candidate_id}/{course_id}.pdf"
+    
+    certificate = CourseCertificate(
+        candidate_id=candidate_id,
+        course_id=course_id,
+        certificate_url=certificate_url,
+        issued_on=datetime.utcnow()
+    )
+    db.add(certificate)
+    analytics.record_certificates(db, [(candidate_id, certificate.issued_on)])
+    db.flush()
+    return certificate
+
+def evaluate_passed_exams(
+    db: Session, passes: Iterable[Tuple[UUID, UUID]]
+) -> List[CourseCertificate]:
+    """
+    Record ``(candidate_id, exam_id)`` passes in the progress tables and issue
+    certificates for the courses they complete; the caller commits.
+    """
+    # Only courses that just gained a passed subject can have become complete
+    pairs = progress.completed_courses(db, progress.record_passes(db, passes))
+    issued = []
+    for candidate_id, course_id in pairs:
+        certificate = _issue_certificate(db, candidate_id, course_id)
+        if certificate:
+            issued.append(certificate)
+    return issued
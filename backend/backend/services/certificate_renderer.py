@@ -0,0 +1,340 @@
+"""
+Certificate PDF rendering pipeline.
+
+Issuing a certificate only records its row; the committing code then queues
+the certificate id here and returns. A dispatcher thread loads the details
+of queued certificates in batches and hands each render to a bounded pool of
+worker processes, which write the PDF atomically to the certificate's
+``certificate_url`` under the uploads tree. At most ``CERTIFICATE_RENDER_WORKERS``
+renders are in flight; the rest wait in the queue. The worker processes are
+spawned on the first render, so a worker that never issues a certificate
+never pays for them.
+
+Queued ids are held in memory, but a certificate is marked ``rendered_at``
+only once its PDF is written, and every start queues the certificates still
+unmarked, so renders lost to a restart are picked up again. If a worker
+process dies, the pool is replaced and the renders it took down are
+retried. Certificates that predate the pipeline can be re-rendered with
+``render_institute``.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+import logging
+import multiprocessing
+import threading
+
+from backend.core.config import settings
+from backend.core.db import SessionLocal
+from backend.models.course import Course
+from backend.models.exam import CourseCertificate
+from backend.models.institute import Institute
+from backend.models.user import Candidate, User
+from backend.utils.certificate_pdf import render_certificate
+from backend.utils.file_utils import get_file_path
+
+logger = logging.getLogger(__name__)
+
+# Renders retried after the pool broke under them, before a certificate is
+# given up on (a certificate that crashes its worker every time)
+_MAX_RETRIES = 2
+
+
+class CertificateRenderer:
+    def __init__(self, workers: int, batch_size: int, template_path: Optional[Path] = None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.template_path = template_path
+
+        self._cond = threading.Condition()
+        self._pending: "deque[UUID]" = deque()
+        self._slots: Optional[threading.BoundedSemaphore] = None
+        self._in_flight = 0
+        # Written PDFs not yet marked rendered_at
+        self._rendered: List[UUID] = []
+        self._retries: Dict[UUID, int] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Metrics
+        self.queued = 0
+        self.recovered = 0
+        self.rendered = 0
+        self.failed = 0
+        self.pool_restarts = 0
+        self.bytes_written = 0
+        self.last_render_ms = 0.0
+        self.max_render_ms = 0.0
+        self.total_render_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="certificate-renderer", daemon=True)
+        self._thread.start()
+        logger.info(f"Certificate renderer started (up to {self.workers} worker processes)")
+
+    def stop(self) -> None:
+        """Finish every queued render and shut the pool down"""
+        if not self._running:
+            return
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._mark_rendered()
+        logger.info("Certificate renderer stopped")
+
+    def enqueue(self, certificate_ids: Iterable[UUID]) -> int:
+        certificate_ids = list(certificate_ids)
+        if not certificate_ids:
+            return 0
+        with self._cond:
+            if not self._running:
+                logger.warning(f"Certificate renderer is not running; {len(certificate_ids)} certificates not rendered")
+                return 0
+            self._pending.extend(certificate_ids)
+            self.queued += len(certificate_ids)
+            self._cond.notify()
+        return len(certificate_ids)
+
+    def _recover(self) -> None:
+        """Queue certificates issued but never rendered, e.g. lost to a restart"""
+        db = SessionLocal()
+        try:
+            certificate_ids = [row.id for row in db.query(CourseCertificate.id).filter(
+                CourseCertificate.rendered_at.is_(None)
+            )]
+        finally:
+            db.close()
+        if certificate_ids:
+            logger.info(f"Re-queueing {len(certificate_ids)} unrendered certificates")
+            self.recovered += self.enqueue(certificate_ids)
+
+    def _run(self) -> None:
+        try:
+            self._recover()
+        except Exception:
+            logger.exception("Failed to look up unrendered certificates")
+        while True:
+            with self._cond:
+                while self._running and not self._pending and not self._rendered:
+                    self._cond.wait()
+                if not self._pending and not self._rendered:
+                    break
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._mark_rendered()
+            if not batch:
+                continue
+            try:
+                self._dispatch(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception(f"Failed to dispatch {len(batch)} certificate renders")
+        # Wait for in-flight renders before the pool is shut down
+        for _ in range(self.workers):
+            self._slots.acquire()
+
+    def _mark_rendered(self) -> None:
+        with self._cond:
+            certificate_ids, self._rendered = self._rendered, []
+        if not certificate_ids:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(CourseCertificate)
+                .where(CourseCertificate.id.in_(certificate_ids))
+                .values(rendered_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception:
+            # The PDFs exist; at worst they are rendered again on the next start
+            db.rollback()
+            logger.exception(f"Failed to mark {len(certificate_ids)} certificates rendered")
+        finally:
+            db.close()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """The worker pool, spawned on first use and after a worker died"""
+        with self._cond:
+            if self._executor is None:
+                # Spawned workers do not inherit the app's threads, sockets or DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Certificate render pool started with {self.workers} worker processes")
+            return self._executor
+
+    def _discard_pool(self, executor: ProcessPoolExecutor) -> None:
+        with self._cond:
+            if self._executor is not executor:
+                return  # already replaced
+            self._executor = None
+            self.pool_restarts += 1
+        logger.warning("Certificate render pool broke (a worker process died); starting a new one")
+        executor.shutdown(wait=False)
+
+    def _retry(self, certificate_id: UUID) -> bool:
+        """Queue a render the pool dropped again, unless it has used up its retries"""
+        with self._cond:
+            attempts = self._retries.get(certificate_id, 0) + 1
+            if attempts > _MAX_RETRIES or not self._running:
+                self._retries.pop(certificate_id, None)
+                return False
+            self._retries[certificate_id] = attempts
+            self._pending.append(certificate_id)
+            self._cond.notify()
+        return True
+
+    def _dispatch(self, certificate_ids: List[UUID]) -> None:
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                CourseCertificate.id,
+                CourseCertificate.certificate_url,
+                CourseCertificate.issued_on,
+                User.full_name,
+                Course.title,
+                Institute.name.label("institute_name")
+            ).join(
+                Candidate, Candidate.user_id == CourseCertificate.candidate_id
+            ).join(
+                User, User.id == Candidate.user_id
+            ).join(
+                Course, Course.id == CourseCertificate.course_id
+            ).outerjoin(
+                Institute, Institute.id == Candidate.institute_id
+            ).filter(CourseCertificate.id.in_(certificate_ids)).all()
+        finally:
+            db.close()
+
+        for row in rows:
+            values = {
+                "candidate_name": row.full_name,
+                "course_title": row.title,
+                "institute_name": row.institute_name or "",
+                "issued_on": row.issued_on.strftime("%d %B %Y") if row.issued_on else "",
+                "certificate_id": str(row.id),
+            }
+            # Blocks while every worker is busy, so the pool's own queue stays bounded
+            self._slots.acquire()
+            with self._cond:
+                self._in_flight += 1
+            executor = self._pool()
+            try:
+                future = executor.submit(
+                    render_certificate, self.template_path, get_file_path(row.certificate_url), values
+                )
+            except BrokenProcessPool:
+                with self._cond:
+                    self._in_flight -= 1
+                self._slots.release()
+                self._discard_pool(executor)
+                if not self._retry(row.id):
+                    self.failed += 1
+                continue
+            except Exception:
+                with self._cond:
+                    self._in_flight -= 1
+                self._slots.release()
+                raise
+            future.add_done_callback(
+                lambda future, certificate_id=row.id, executor=executor: self._done(certificate_id, executor, future)
+            )
+
+    def _done(self, certificate_id: UUID, executor: ProcessPoolExecutor, future: Future) -> None:
+        with self._cond:
+            self._in_flight -= 1
+        self._slots.release()
+        try:
+            size, elapsed_ms = future.result()
+        except BrokenProcessPool:
+            self._discard_pool(executor)
+            if not self._retry(certificate_id):
+                self.failed += 1
+                logger.error(f"Giving up on certificate {certificate_id}: its render kept killing the worker")
+            return
+        except Exception:
+            self.failed += 1
+            logger.exception(f"Failed to render certificate {certificate_id}")
+            return
+        with self._cond:
+            self._retries.pop(certificate_id, None)
+            self._rendered.append(certificate_id)
+            self._cond.notify()
+        self.rendered += 1
+        self.bytes_written += size
+        self.last_render_ms = elapsed_ms
+        self.max_render_ms = max(self.max_render_ms, elapsed_ms)
+        self.total_render_ms += elapsed_ms
+
+    def stats(self) -> dict:
+        with self._cond:
+            queue_depth = len(self._pending)
+            in_flight = self._in_flight
+        return {
+            "enabled": self._running,
+            "workers": self.workers,
+            "queue_depth": queue_depth,
+            "in_flight": in_flight,
+            "pool_started": self._executor is not None,
+            "queued": self.queued,
+            "recovered": self.recovered,
+            "rendered": self.rendered,
+            "failed": self.failed,
+            "pool_restarts": self.pool_restarts,
+            "bytes_written": self.bytes_written,
+            "last_render_ms": self.last_render_ms,
+            "max_render_ms": self.max_render_ms,
+            "avg_render_ms": (self.total_render_ms / self.rendered) if self.rendered > 0 else 0.0,
+        }
+
+
+_renderer = CertificateRenderer(
+    workers=settings.CERTIFICATE_RENDER_WORKERS,
+    batch_size=settings.CERTIFICATE_RENDER_BATCH_SIZE,
+    template_path=settings.CERTIFICATE_TEMPLATE_PATH,
+)
+
+
+def start() -> None:
+    _renderer.start()
+
+
+def stop() -> None:
+    _renderer.stop()
+
+
+def enqueue(certificate_ids: Iterable[UUID]) -> int:
+    """Queue committed certificates for rendering"""
+    return _renderer.enqueue(certificate_ids)
+
+
+def render_institute(db: Session, institute_id: UUID) -> int:
+    """Queue every certificate held by an institute's candidates for re-rendering"""
+    rows = db.query(CourseCertificate.id).join(
+        Candidate, Candidate.user_id == CourseCertificate.candidate_id
+    ).filter(Candidate.institute_id == institute_id).all()
+    return _renderer.enqueue(row.id for row in rows)
+
+
+def stats() -> dict:
+    return _renderer.stats()
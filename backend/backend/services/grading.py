@@ -0,0 +1,75 @@
+"""
+Answer-key grading engine.
+
+An exam's answer key is a fixed-width byte string with one ASCII option
+letter per question, and a submission is encoded the same way with a zero
+byte for unanswered questions. A whole batch of submissions is graded at
+once by XOR-ing the concatenated submissions against the repeated key as
+two big integers; matching positions become zero bytes, which a single
+``bytes.translate`` turns into a per-question correctness mask.
+"""
+from typing import Dict, List, NamedTuple, Sequence
+
+PASS_THRESHOLD = 40.0
+VALID_ANSWERS = b"abcd"
+UNANSWERED = 0
+
+# Maps a zero byte (key and answer matched) to 1 and everything else to 0
+_MATCH_TABLE = bytes([1] + [0] * 255)
+
+
+class GradeResult(NamedTuple):
+    mask: bytes  # one byte per question, 1 if answered correctly
+    correct: int
+    total: int
+    score_percentage: float
+    passed: bool
+
+
+def encode_submission(answers: Dict[str, str], total_questions: int) -> bytes:
+    """
+    Encode a ``question index -> option`` map into a fixed-width answer array.
+
+    Keys must be the canonical decimal question index ("0", "1", ...);
+    anything out of range or not an option letter is left unanswered.
+    """
+    encoded = bytearray(total_questions)
+    for question_id, answer in answers.items():
+        if not question_id.isdigit():
+            continue
+        index = int(question_id)
+        if index >= total_questions or str(index) != question_id:
+            continue
+        answer = answer.strip().lower().encode()
+        if len(answer) == 1 and answer in VALID_ANSWERS:
+            encoded[index] = answer[0]
+    return bytes(encoded)
+
+
+def _result(mask: bytes) -> GradeResult:
+    total = len(mask)
+    correct = mask.count(1)
+    score_percentage = (correct / total * 100) if total > 0 else 0.0
+    return GradeResult(mask, correct, total, score_percentage, score_percentage >= PASS_THRESHOLD)
+
+
+def grade_batch(answer_key: bytes, submissions: Sequence[bytes]) -> List[GradeResult]:
+    """Grade many encoded submissions against one answer key"""
+    width = len(answer_key)
+    if not submissions:
+        return []
+    if width == 0:
+        return [_result(b"") for _ in submissions]
+    for submission in submissions:
+        if len(submission) != width:
+            raise ValueError(f"Submission has {len(submission)} answers, expected {width}")
+
+    size = width * len(submissions)
+    diff = int.from_bytes(b"".join(submissions), "big") ^ int.from_bytes(answer_key * len(submissions), "big")
+    masks = diff.to_bytes(size, "big").translate(_MATCH_TABLE)
+    return [_result(masks[offset:offset + width]) for offset in range(0, size, width)]
+
+
+def grade(answer_key: bytes, submission: bytes) -> GradeResult:
+    """Grade a single encoded submission"""
+    return grade_batch(answer_key, [submission])[0]
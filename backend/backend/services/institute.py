@@ -3,6 +3,7 @@ from uuid import uuid4
 
 from ..models.institute import Institute
 from ..schemas.institute import InstituteCreate, InstituteInDB
+from ..services import analytics
 
 def create_institute(db: Session, institute: InstituteCreate) -> InstituteInDB:
     db_institute = Institute(
@@ -12,6 +13,7 @@ def create_institute(db: Session, institute: InstituteCreate) -> InstituteInDB:
         block=institute.block
     )
     db.add(db_institute)
+    analytics.record(db, total_institutes=1)
     db.commit()
     db.refresh(db_institute)
     return InstituteInDB.from_orm(db_institute)
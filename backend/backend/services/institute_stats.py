@@ -0,0 +1,115 @@
+"""
+Per-institute statistics.
+
+Every metric comes from its own ``GROUP BY institute_id`` subquery, and the
+subqueries are outer-joined to ``institutes`` in a single statement, so the
+stats for every institute (or a filtered subset) cost one round-trip
+regardless of how many institutes there are.
+"""
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from backend.models.course import Subject
+from backend.models.exam import Exam, ExamAttempt, CourseCertificate
+from backend.models.institute import Institute
+from backend.models.user import Candidate, Trainer
+
+SORT_FIELDS = (
+    "name", "district", "block", "created_at",
+    "total_candidates", "total_trainers", "total_subjects", "total_exams",
+    "total_certificates", "total_attempts", "passed_attempts", "pass_rate",
+)
+
+
+def _count_by_institute(institute_column, *joins, institute_id: Optional[UUID] = None, **counts):
+    """``SELECT institute_id, <counts> ... GROUP BY institute_id`` as a subquery"""
+    query = select(institute_column.label("institute_id"), *(
+        expression.label(name) for name, expression in counts.items()
+    ))
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    if institute_id is not None:
+        query = query.where(institute_column == institute_id)
+    return query.group_by(institute_column).subquery()
+
+
+def query_institute_stats(
+    db: Session,
+    institute_id: Optional[UUID] = None,
+    sort: str = "name",
+    descending: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict], int]:
+    """Return (stats rows, total matching institutes), sorted and paged"""
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"Cannot sort by {sort}")
+
+    candidates = _count_by_institute(Candidate.institute_id, institute_id=institute_id, total_candidates=func.count())
+    trainers = _count_by_institute(Trainer.institute_id, institute_id=institute_id, total_trainers=func.count())
+    subjects = _count_by_institute(Subject.institute_id, institute_id=institute_id, total_subjects=func.count())
+    exams = _count_by_institute(Exam.institute_id, institute_id=institute_id, total_exams=func.count())
+    certificates = _count_by_institute(
+        Candidate.institute_id,
+        (CourseCertificate, CourseCertificate.candidate_id == Candidate.user_id),
+        institute_id=institute_id,
+        total_certificates=func.count()
+    )
+    attempts = _count_by_institute(
+        Candidate.institute_id,
+        (ExamAttempt, ExamAttempt.candidate_id == Candidate.user_id),
+        institute_id=institute_id,
+        total_attempts=func.count(),
+        passed_attempts=func.count(case((ExamAttempt.passed == True, literal(1))))
+    )
+
+    total_attempts = func.coalesce(attempts.c.total_attempts, 0)
+    passed_attempts = func.coalesce(attempts.c.passed_attempts, 0)
+    columns = {
+        "total_candidates": func.coalesce(candidates.c.total_candidates, 0),
+        "total_trainers": func.coalesce(trainers.c.total_trainers, 0),
+        "total_subjects": func.coalesce(subjects.c.total_subjects, 0),
+        "total_exams": func.coalesce(exams.c.total_exams, 0),
+        "total_certificates": func.coalesce(certificates.c.total_certificates, 0),
+        "total_attempts": total_attempts,
+        "passed_attempts": passed_attempts,
+        "pass_rate": case(
+            (total_attempts > 0, passed_attempts * 100.0 / total_attempts), else_=0.0
+        ),
+    }
+
+    query = select(
+        Institute.id, Institute.name, Institute.district, Institute.block, Institute.created_at,
+        *(expression.label(name) for name, expression in columns.items()),
+        func.count().over().label("total_count")
+    )
+    for subquery in (candidates, trainers, subjects, exams, certificates, attempts):
+        query = query.outerjoin(subquery, subquery.c.institute_id == Institute.id)
+    if institute_id is not None:
+        query = query.where(Institute.id == institute_id)
+
+    sort_column = columns[sort] if sort in columns else getattr(Institute, sort)
+    query = query.order_by(
+        sort_column.desc() if descending else sort_column.asc(),
+        Institute.id
+    ).offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+
+    rows = db.execute(query).all()
+    if rows:
+        total = rows[0].total_count
+    elif offset > 0:
+        # Paged past the end; the window count has no row to ride on
+        count_query = select(func.count(Institute.id))
+        if institute_id is not None:
+            count_query = count_query.where(Institute.id == institute_id)
+        total = db.execute(count_query).scalar_one()
+    else:
+        total = 0
+    return [
+        {key: value for key, value in row._asdict().items() if key != "total_count"}
+        for row in rows
+    ], total
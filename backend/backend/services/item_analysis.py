@@ -0,0 +1,218 @@
+"""
+Per-question item analysis over stored exam answers.
+
+For every question of an exam this reports the percent of candidates who
+answered it correctly, how answers were spread over the options, and a
+discrimination index: the point-biserial correlation between getting the
+question right and the score on the rest of the exam. Questions that
+strong candidates miss and weak candidates get right come out negative.
+
+All of it is derived from running sums kept in ``exam_item_stats`` and
+``exam_item_analysis``. New attempts are folded in past a ``recorded_at``
+high-water mark, a batch at a time, with the batch graded the way
+``grading`` does it (one fixed-width byte string per submission), so each
+question's counts are ``bytes.count`` over a strided slice. History is only
+rescanned when the exam's question set changes.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+import logging
+import math
+
+from backend.core.config import settings
+from backend.core.db import upsert
+from backend.models.analytics import ExamItemAnalysis, ExamItemStats
+from backend.models.exam import Exam, ExamAttempt
+from backend.services import grading, question_bank
+
+logger = logging.getLogger(__name__)
+
+OPTIONS = ("a", "b", "c", "d")
+ITEM_COUNTERS = ("correct", *(f"option_{option}" for option in OPTIONS), "unanswered", "correct_total_sum")
+
+# Thresholds behind the flags attached to each question
+HARD_BELOW_PERCENT = 30.0
+EASY_ABOVE_PERCENT = 90.0
+LOW_DISCRIMINATION = 0.2
+
+
+class _BatchTotals:
+    """Deltas accumulated from one fold"""
+
+    def __init__(self, width: int):
+        self.width = width
+        self.attempts = 0
+        self.total_score_sum = 0
+        self.total_score_sq_sum = 0
+        self.items = [dict.fromkeys(ITEM_COUNTERS, 0) for _ in range(width)]
+
+    def add(self, answer_key: bytes, answer_maps: Sequence[Optional[Dict[str, str]]]) -> None:
+        width = self.width
+        encoded = [grading.encode_submission(answers or {}, width) for answers in answer_maps]
+        results = grading.grade_batch(answer_key, encoded)
+        responses = b"".join(encoded)
+        masks = b"".join(result.mask for result in results)
+
+        # Masks grouped by total score, to weight each question's correct count by it
+        by_total = defaultdict(list)
+        for result in results:
+            by_total[result.correct].append(result.mask)
+            self.total_score_sum += result.correct
+            self.total_score_sq_sum += result.correct * result.correct
+        self.attempts += len(results)
+        by_total = {total: b"".join(group) for total, group in by_total.items() if total}
+
+        for position, item in enumerate(self.items):
+            column = responses[position::width]
+            for option in OPTIONS:
+                item[f"option_{option}"] += column.count(option.encode())
+            item["unanswered"] += column.count(grading.UNANSWERED)
+            item["correct"] += masks[position::width].count(1)
+            item["correct_total_sum"] += sum(
+                total * group[position::width].count(1) for total, group in by_total.items()
+            )
+
+
+def _lock_state(db: Session, exam_id) -> ExamItemAnalysis:
+    db.execute(upsert(db, ExamItemAnalysis).values(exam_id=exam_id).on_conflict_do_nothing(
+        index_elements=["exam_id"]
+    ))
+    # Concurrent refreshes of one exam queue here rather than fold the same attempts twice
+    return db.query(ExamItemAnalysis).filter(
+        ExamItemAnalysis.exam_id == exam_id
+    ).with_for_update().populate_existing().one()
+
+
+def refresh(db: Session, exam: Exam) -> ExamItemAnalysis:
+    """Fold an exam's settled attempts recorded since the last refresh into its item stats; the caller commits"""
+    answer_key = question_bank.get_answer_key(db, exam)
+    version = question_bank.get_exam_version(db, exam.id)
+    state = _lock_state(db, exam.id)
+
+    if state.exam_version != version:
+        # New question set: counts against the old one are meaningless, start over
+        db.query(ExamItemStats).filter(ExamItemStats.exam_id == exam.id).delete(synchronize_session=False)
+        state.exam_version = version
+        state.attempts = state.total_score_sum = state.total_score_sq_sum = 0
+        state.analyzed_through = None
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.ITEM_ANALYSIS_SETTLE_SECONDS)
+    query = select(ExamAttempt.answers).where(
+        ExamAttempt.exam_id == exam.id,
+        ExamAttempt.recorded_at <= cutoff
+    )
+    if state.analyzed_through is not None:
+        query = query.where(ExamAttempt.recorded_at > state.analyzed_through)
+
+    totals = _BatchTotals(len(answer_key))
+    result = db.execute(query.execution_options(yield_per=settings.ITEM_ANALYSIS_BATCH_SIZE))
+    for rows in result.partitions():
+        totals.add(answer_key, [row.answers for row in rows])
+
+    if totals.attempts and totals.width:
+        statement = upsert(db, ExamItemStats).values([
+            dict(exam_id=exam.id, position=position, **item) for position, item in enumerate(totals.items)
+        ])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["exam_id", "position"],
+            set_={name: getattr(ExamItemStats, name) + statement.excluded[name] for name in ITEM_COUNTERS}
+        ))
+    state.attempts += totals.attempts
+    state.total_score_sum += totals.total_score_sum
+    state.total_score_sq_sum += totals.total_score_sq_sum
+    state.analyzed_through = cutoff
+    state.updated_at = datetime.now(timezone.utc)
+    db.flush()
+    if totals.attempts:
+        logger.info(f"Folded {totals.attempts} attempts into item analysis of exam {exam.id}")
+    return state
+
+
+def _discrimination(n: int, correct: int, correct_total_sum: int, total_sum: int, total_sq_sum: int) -> Optional[float]:
+    """
+    Point-biserial correlation of a question with the rest score (total minus
+    the question itself), from running sums. None when it is undefined, i.e.
+    everyone or no one got the question right or rest scores do not vary.
+    """
+    incorrect = n - correct
+    if correct == 0 or incorrect == 0:
+        return None
+    # A correct answer adds exactly one to the total, so the rest-score sums
+    # follow from the total-score sums without revisiting the attempts
+    rest_sum = total_sum - correct
+    rest_sq_sum = total_sq_sum - 2 * correct_total_sum + correct
+    variance = rest_sq_sum / n - (rest_sum / n) ** 2
+    if variance <= 1e-12:
+        return None
+    mean_correct = (correct_total_sum - correct) / correct
+    mean_incorrect = (total_sum - correct_total_sum) / incorrect
+    return (mean_correct - mean_incorrect) / math.sqrt(variance) * math.sqrt(correct * incorrect) / n
+
+
+def get_item_analysis(db: Session, exam: Exam) -> dict:
+    """Bring an exam's item analysis up to date and report it per question"""
+    state = refresh(db, exam)
+    db.commit()
+
+    counts = {
+        row.position: row for row in db.query(ExamItemStats).filter(ExamItemStats.exam_id == exam.id)
+    }
+    n = state.attempts
+    items = []
+    for position, (question, correct_answer) in enumerate(question_bank.get_questions_with_answers(db, exam)):
+        row = counts.get(position)
+        correct = row.correct if row else 0
+        percent_correct = correct / n * 100 if n else None
+        discrimination = _discrimination(
+            n, correct, row.correct_total_sum if row else 0, state.total_score_sum, state.total_score_sq_sum
+        ) if n else None
+
+        flags = []
+        if percent_correct is not None and percent_correct < HARD_BELOW_PERCENT:
+            flags.append("hard")
+        if percent_correct is not None and percent_correct > EASY_ABOVE_PERCENT:
+            flags.append("easy")
+        if discrimination is not None and discrimination < LOW_DISCRIMINATION:
+            flags.append("low_discrimination")
+        if row and any(
+            getattr(row, f"option_{option}") > correct for option in OPTIONS if option != correct_answer
+        ):
+            # A wrong option outdrew the key: ambiguous wording or a wrong key
+            flags.append("distractor_preferred")
+
+        items.append({
+            "position": position,
+            "question": question["question"],
+            "correct_answer": correct_answer,
+            "percent_correct": percent_correct,
+            "option_distribution": {
+                **{option: getattr(row, f"option_{option}") if row else 0 for option in OPTIONS},
+                "unanswered": row.unanswered if row else 0
+            },
+            "discrimination_index": discrimination,
+            "flags": flags
+        })
+
+    return {
+        "exam_id": str(exam.id),
+        "attempts_analyzed": n,
+        "analyzed_through": state.analyzed_through,
+        "items": items
+    }
+
+
+def refresh_all(db: Session) -> int:
+    """Refresh every exam with attempts, committing per exam; returns how many were refreshed"""
+    exam_ids = db.scalars(select(ExamAttempt.exam_id).distinct()).all()
+    for exam_id in exam_ids:
+        exam = db.get(Exam, exam_id)
+        try:
+            refresh(db, exam)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception(f"Item analysis refresh failed for exam {exam_id}")
+    return len(exam_ids)
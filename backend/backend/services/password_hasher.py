@@ -0,0 +1,127 @@
+"""
+Password hashing and verification off the event loop.
+
+bcrypt costs a couple of hundred milliseconds of CPU per call, so it runs on a
+small pool of worker processes instead of in request handlers. At most
+``PASSWORD_HASH_MAX_PENDING`` calls may be running or queued; past that,
+new calls are refused with 503 and ``Retry-After`` rather than queued behind
+a growing backlog, so a login burst degrades into fast retries instead of
+stalling every request.
+
+Without a started pool (scripts, tests), calls run in the threadpool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from typing import Callable, Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+from backend.core.config import settings
+from backend.core.security import get_password_hash, verify_password as _verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int, retry_after: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Metrics
+        self.completed = 0
+        self.rejected = 0
+        self.max_pending_seen = 0
+        self.total_ms = 0.0
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"Password hasher started with {self.workers} worker processes")
+
+    def stop(self) -> None:
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-ins in progress, please retry shortly",
+                    headers={"Retry-After": str(self.retry_after)}
+                )
+            self._pending += 1
+            self.max_pending_seen = max(self.max_pending_seen, self._pending)
+
+    async def run(self, fn: Callable, *args):
+        self._admit()
+        started = time.perf_counter()
+        try:
+            if self._executor is None:
+                return await run_in_threadpool(fn, *args)
+            return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+                self.total_ms += (time.perf_counter() - started) * 1000
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending
+        return {
+            "enabled": self._executor is not None,
+            "workers": self.workers,
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "max_pending_seen": self.max_pending_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            # Includes time spent queued for a worker
+            "avg_ms": (self.total_ms / self.completed) if self.completed > 0 else 0.0,
+        }
+
+
+_hasher = PasswordHasher(
+    # Leave cores for the event loop and the other worker pools by default; every
+    # app worker on the host gets its own pool, so they share half the cores
+    workers=settings.PASSWORD_HASH_WORKERS or max(1, (os.cpu_count() or 2) // 2 // settings.WEB_CONCURRENCY),
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
+
+
+def start() -> None:
+    _hasher.start()
+
+
+def stop() -> None:
+    _hasher.stop()
+
+
+async def hash_password(password: str) -> str:
+    return await _hasher.run(get_password_hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _hasher.run(_verify_password, password, hashed_password)
+
+
+def stats() -> dict:
+    return _hasher.stats()
@@ -0,0 +1,183 @@
+"""
+Materialized candidate progress.
+
+``candidate_subject_progress`` holds one row per subject a candidate has
+passed and ``candidate_course_progress`` the number of such subjects per
+course. Both are maintained incrementally as passes are recorded, so course
+completion is a single-row comparison against ``courses.subject_count``
+instead of a scan of the candidate's attempt history.
+"""
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+from collections import Counter
+
+from backend.core.config import settings
+from backend.core.db import upsert
+from backend.models.course import Course, Subject
+from backend.models.exam import Exam, ExamAttempt, CourseCertificate
+from backend.models.progress import CandidateCourseProgress, CandidateSubjectProgress
+from backend.models.user import Candidate
+from backend.utils.cache import LRUCache
+
+# Per-candidate dashboard summaries. Passes and certificates invalidate a
+# candidate's entry in this worker; the TTL bounds staleness across workers
+# and after catalog changes.
+_summaries = LRUCache(
+    max_entries=settings.CANDIDATE_PROGRESS_CACHE_MAX_ENTRIES,
+    ttl=settings.CANDIDATE_PROGRESS_CACHE_TTL_SECONDS,
+)
+
+def record_passes(db: Session, passes: Iterable[Tuple[UUID, UUID]]) -> List[Tuple[UUID, UUID]]:
+    """
+    Record ``(candidate_id, exam_id)`` passes; the caller commits.
+
+    Returns the ``(candidate_id, course_id)`` pairs that gained a newly passed
+    subject. Repeat passes of a subject change nothing and are not returned.
+    """
+    passes = set(passes)
+    if not passes:
+        return []
+    
+    subject_of_exam = {
+        row.id: (row.subject_id, row.course_id)
+        for row in db.query(Exam.id, Exam.subject_id, Subject.course_id).join(Subject).filter(
+            Exam.id.in_({exam_id for _, exam_id in passes})
+        )
+    }
+    rows = [
+        dict(candidate_id=candidate_id, subject_id=subject_id, course_id=course_id)
+        for candidate_id, subject_id, course_id in {
+            (candidate_id, *subject_of_exam[exam_id])
+            for candidate_id, exam_id in passes
+            if exam_id in subject_of_exam
+        }
+    ]
+    if not rows:
+        return []
+    
+    # Only rows that did not exist yet come back, so each subject is counted once
+    inserted = db.execute(
+        upsert(db, CandidateSubjectProgress).values(rows).on_conflict_do_nothing(
+            index_elements=["candidate_id", "subject_id"]
+        ).returning(CandidateSubjectProgress.candidate_id, CandidateSubjectProgress.course_id)
+    ).all()
+    gained = Counter(
+        (row.candidate_id, row.course_id) for row in inserted if row.course_id is not None
+    )
+    if not gained:
+        return []
+    
+    statement = upsert(db, CandidateCourseProgress).values([
+        dict(candidate_id=candidate_id, course_id=course_id, passed_subjects=count)
+        for (candidate_id, course_id), count in gained.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["candidate_id", "course_id"],
+        set_={
+            "passed_subjects": CandidateCourseProgress.passed_subjects + statement.excluded.passed_subjects,
+            "updated_at": func.now(),
+        }
+    ))
+    return list(gained)
+
+def is_course_complete(db: Session, candidate_id: UUID, course_id: UUID) -> bool:
+    """Whether the candidate has passed every subject of the course"""
+    row = db.query(CandidateCourseProgress.passed_subjects, Course.subject_count).join(
+        Course, Course.id == CandidateCourseProgress.course_id
+    ).filter(
+        CandidateCourseProgress.candidate_id == candidate_id,
+        CandidateCourseProgress.course_id == course_id
+    ).first()
+    return row is not None and row.passed_subjects >= row.subject_count
+
+def completed_courses(db: Session, pairs: Iterable[Tuple[UUID, UUID]]) -> List[Tuple[UUID, UUID]]:
+    """The ``(candidate_id, course_id)`` pairs whose course is complete"""
+    pairs = list(pairs)
+    if not pairs:
+        return []
+    rows = db.query(CandidateCourseProgress.candidate_id, CandidateCourseProgress.course_id).join(
+        Course, Course.id == CandidateCourseProgress.course_id
+    ).filter(
+        tuple_(CandidateCourseProgress.candidate_id, CandidateCourseProgress.course_id).in_(pairs),
+        CandidateCourseProgress.passed_subjects >= Course.subject_count
+    ).all()
+    return [(row.candidate_id, row.course_id) for row in rows]
+
+def get_candidate_summary(db: Session, candidate_id: UUID) -> Optional[dict]:
+    """
+    Course, subject, passed-subject and certificate counts for a candidate in
+    one round-trip, served from the per-candidate cache. None if no such candidate.
+    """
+    summary = _summaries.get(candidate_id)
+    if summary is not None:
+        return summary
+    
+    row = db.execute(select(
+        select(Candidate.user_id).where(Candidate.user_id == candidate_id).scalar_subquery().label("candidate_id"),
+        select(func.count(Course.id)).scalar_subquery().label("total_courses"),
+        select(func.count(Subject.id)).scalar_subquery().label("total_subjects"),
+        select(func.count()).select_from(CandidateSubjectProgress).where(
+            CandidateSubjectProgress.candidate_id == candidate_id
+        ).scalar_subquery().label("completed_subjects"),
+        select(func.count(CourseCertificate.id)).where(
+            CourseCertificate.candidate_id == candidate_id
+        ).scalar_subquery().label("earned_certificates"),
+    )).one()
+    if row.candidate_id is None:
+        return None
+    
+    summary = {
+        "total_courses": row.total_courses,
+        "total_subjects": row.total_subjects,
+        "completed_subjects": row.completed_subjects,
+        "earned_certificates": row.earned_certificates,
+        "completion_percentage": (row.completed_subjects / row.total_subjects * 100) if row.total_subjects > 0 else 0
+    }
+    _summaries.set(candidate_id, summary)
+    return summary
+
+def invalidate_candidates(candidate_ids: Iterable[UUID]) -> None:
+    """Drop cached summaries after a commit that changed these candidates' progress"""
+    for candidate_id in set(candidate_ids):
+        _summaries.pop(candidate_id)
+
+def invalidate_all() -> None:
+    """Drop every cached summary, e.g. after a course or subject is added"""
+    _summaries.clear()
+
+def cache_stats() -> dict:
+    return _summaries.stats()
+
+def rebuild(db: Session) -> Tuple[int, int]:
+    """
+    Recompute course subject counts and both progress tables from exam
+    attempts; the caller commits. Returns (subject rows, course rows).
+    """
+    subject_counts = select(func.count(Subject.id)).where(
+        Subject.course_id == Course.id
+    ).scalar_subquery()
+    db.query(Course).update({Course.subject_count: subject_counts}, synchronize_session=False)
+    
+    db.query(CandidateCourseProgress).delete(synchronize_session=False)
+    db.query(CandidateSubjectProgress).delete(synchronize_session=False)
+    
+    first_passes = select(
+        ExamAttempt.candidate_id, Exam.subject_id, Subject.course_id, func.min(ExamAttempt.attempted_on)
+    ).select_from(ExamAttempt).join(Exam).join(Subject).where(
+        ExamAttempt.passed == True
+    ).group_by(ExamAttempt.candidate_id, Exam.subject_id, Subject.course_id)
+    subject_rows = db.execute(insert(CandidateSubjectProgress).from_select(
+        ["candidate_id", "subject_id", "course_id", "passed_on"], first_passes
+    )).rowcount
+    
+    per_course = select(
+        CandidateSubjectProgress.candidate_id, CandidateSubjectProgress.course_id, func.count()
+    ).where(
+        CandidateSubjectProgress.course_id.isnot(None)
+    ).group_by(CandidateSubjectProgress.candidate_id, CandidateSubjectProgress.course_id)
+    course_rows = db.execute(insert(CandidateCourseProgress).from_select(
+        ["candidate_id", "course_id", "passed_subjects"], per_course
+    )).rowcount
+    return subject_rows, course_rows
@@ -0,0 +1,227 @@
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+from pathlib import Path
+import csv
+import gzip
+import io
+import json
+import logging
+
+from backend.core.config import settings
+from backend.core.db import SessionLocal
+from backend.models.exam import Exam, Question
+from backend.utils.cache import LRUCache
+from backend.utils.exam_csv import QUESTION_FIELDS, iter_exam_rows
+from backend.utils.file_utils import get_file_path
+
+logger = logging.getLogger(__name__)
+
+_QUESTION_COLUMNS = [getattr(Question, field) for field in QUESTION_FIELDS]
+
+_answer_keys = LRUCache(
+    max_entries=settings.QUESTION_BANK_CACHE_MAX_ENTRIES,
+    max_bytes=settings.QUESTION_BANK_CACHE_MAX_BYTES,
+    sizeof=len,
+)
+
+_versions = LRUCache(
+    max_entries=settings.QUESTION_BANK_CACHE_MAX_ENTRIES * 8,
+    ttl=settings.EXAM_VERSION_CACHE_TTL_SECONDS,
+)
+_bundles = LRUCache(
+    max_entries=settings.QUESTION_BANK_CACHE_MAX_ENTRIES,
+    max_bytes=settings.EXAM_BUNDLE_CACHE_MAX_BYTES,
+    sizeof=len,
+)
+
+
+def resolve_exam_file(exam: Exam) -> Path:
+    """Locate the CSV backing an exam, including the legacy uploads/exams/<exam_id>/ layout"""
+    file_path = get_file_path(exam.csv_url)
+    if file_path.exists():
+        return file_path
+
+    alternate_path = Path(f"uploads/exams/{exam.id}/{exam.csv_url.split('/')[-1]}")
+    if alternate_path.exists():
+        return alternate_path
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Exam CSV file not found at {file_path}"
+    )
+
+
+def _ensure_ingested(exam: Exam) -> None:
+    """
+    Load an exam's CSV into exam_questions if it predates the table.
+
+    Runs once per legacy exam, on its first use (or ahead of time through
+    scripts/ingest_exam_questions), on a session of its own so the caller's
+    transaction is untouched. The exam row lock makes concurrent first
+    requests ingest it once.
+    """
+    if exam.question_count is not None:
+        return
+    if not exam.csv_url:
+        raise HTTPException(status_code=404, detail="Exam or questions not found")
+
+    with SessionLocal() as db:
+        locked = db.query(Exam).filter(Exam.id == exam.id).with_for_update().one()
+        if locked.question_count is None:
+            csv_path = resolve_exam_file(locked)
+            logger.info(f"Ingesting questions of exam {exam.id} from {csv_path}")
+            with open(csv_path, "r", newline="") as f:
+                store_exam_questions(db, locked, iter_exam_rows(f))
+            db.commit()
+        # Seen as loaded, not as changes for the caller's session to write back
+        set_committed_value(exam, "question_count", locked.question_count)
+        set_committed_value(exam, "questions_updated_at", locked.questions_updated_at)
+
+
+def store_exam_questions(db: Session, exam: Exam, rows: Iterable[Tuple[Dict[str, str], str]]) -> int:
+    """
+    Replace an exam's questions with ``rows`` in one bulk insert.
+
+    Uses ``COPY ... FROM STDIN`` on PostgreSQL and a multi-row insert
+    elsewhere. The caller owns the transaction and must commit.
+    """
+    db.query(Question).filter(Question.exam_id == exam.id).delete(synchronize_session=False)
+
+    records = [
+        (exam.id, position, *(question[field] for field in QUESTION_FIELDS), correct_answer)
+        for position, (question, correct_answer) in enumerate(rows)
+    ]
+    if records:
+        if db.get_bind().dialect.name == "postgresql":
+            _copy_questions(db, records)
+        else:
+            columns = ['exam_id', 'position', *QUESTION_FIELDS, 'correct_answer']
+            db.execute(insert(Question), [dict(zip(columns, record)) for record in records])
+
+    exam.question_count = len(records)
+    exam.questions_updated_at = datetime.utcnow()
+    return len(records)
+
+
+def _copy_questions(db: Session, records: List[tuple]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(records)
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY exam_questions (exam_id, position, question, option_a, option_b, "
+            "option_c, option_d, correct_answer) FROM STDIN WITH (FORMAT csv, "
+            "FORCE_NOT_NULL (question, option_a, option_b, option_c, option_d))",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def get_question_count(db: Session, exam: Exam) -> int:
+    _ensure_ingested(exam)
+    return exam.question_count
+
+
+def get_question_page(db: Session, exam: Exam, start: int, stop: int) -> List[Dict[str, str]]:
+    """Answer-free questions at positions ``[start, stop)``"""
+    _ensure_ingested(exam)
+    # Positions are dense, so a page is a (exam_id, position) primary-key range scan
+    rows = db.query(*_QUESTION_COLUMNS).filter(
+        Question.exam_id == exam.id,
+        Question.position >= start,
+        Question.position < stop
+    ).order_by(Question.position).all()
+    return [row._asdict() for row in rows]
+
+
+def get_answer_key(db: Session, exam: Exam) -> bytes:
+    """One ASCII option letter per question, fetched in a single round-trip and cached"""
+    _ensure_ingested(exam)
+    key = (exam.id, exam.questions_updated_at)
+    answer_key = _answer_keys.get(key)
+    if answer_key is None:
+        rows = db.query(Question.correct_answer).filter(
+            Question.exam_id == exam.id
+        ).order_by(Question.position).all()
+        answer_key = "".join(row.correct_answer for row in rows).encode("ascii")
+        _answer_keys.set(key, answer_key)
+    return answer_key
+
+
+def get_questions_with_answers(db: Session, exam: Exam) -> List[Tuple[Dict[str, str], str]]:
+    _ensure_ingested(exam)
+    rows = db.query(*_QUESTION_COLUMNS, Question.correct_answer).filter(
+        Question.exam_id == exam.id
+    ).order_by(Question.position).all()
+    return [
+        ({field: getattr(row, field) for field in QUESTION_FIELDS}, row.correct_answer)
+        for row in rows
+    ]
+
+
+def get_exam_version(db: Session, exam_id: UUID) -> Optional[str]:
+    """
+    Version tag of an exam's question set, or None if it has no questions.
+
+    Served from a short-lived cache so conditional requests can be answered
+    without loading the exam; the TTL bounds staleness across workers.
+    """
+    version = _versions.get(exam_id)
+    if version is None:
+        row = db.query(Exam.csv_url, Exam.csv_sha256, Exam.questions_updated_at).filter(
+            Exam.id == exam_id
+        ).first()
+        if not row or not row.csv_url:
+            return None
+        version = _version_of(row)
+        _versions.set(exam_id, version)
+    return version
+
+
+def _version_of(exam) -> str:
+    updated_at = exam.questions_updated_at.isoformat() if exam.questions_updated_at else ""
+    return f"{exam.csv_url}:{exam.csv_sha256 or ''}:{updated_at}"
+
+
+def get_exam_bundle(db: Session, exam: Exam, gzipped: bool = True) -> bytes:
+    """
+    JSON of an exam's complete answer-free question set, gzip-compressed by default.
+
+    Each coding is built once per exam version and then served from memory,
+    so a device can fetch the whole exam in one request before starting.
+    """
+    key = (exam.id, _version_of(exam), "gzip" if gzipped else "identity")
+    bundle = _bundles.get(key)
+    if bundle is None:
+        questions = get_question_page(db, exam, 0, get_question_count(db, exam))
+        payload = json.dumps(
+            {"exam_id": str(exam.id), "title": exam.title, "total": len(questions), "questions": questions},
+            ensure_ascii=False,
+            separators=(",", ":")
+        ).encode()
+        bundle = gzip.compress(payload, compresslevel=9, mtime=0) if gzipped else payload
+        _bundles.set(key, bundle)
+    return bundle
+
+
+def invalidate_exam(exam_id: UUID) -> int:
+    """Drop every cached answer key, bundle and version for an exam (e.g. after a CSV re-upload)"""
+    _versions.pop(exam_id)
+    return (
+        _answer_keys.discard_where(lambda key: key[0] == exam_id)
+        + _bundles.discard_where(lambda key: key[0] == exam_id)
+    )
+
+
+def cache_stats() -> dict:
+    return {
+        "answer_keys": _answer_keys.stats(),
+        "bundles": _bundles.stats(),
+    }
@@ -0,0 +1,382 @@
+"""
+Write-behind pipeline for graded exam attempts.
+
+When ``SUBMISSION_WRITE_BEHIND`` is enabled, ``submit_exam`` grades the
+submission, hands the attempt row to this queue and responds immediately.
+A background thread flushes queued attempts as one multi-row insert every
+``SUBMISSION_FLUSH_INTERVAL_MS`` or as soon as ``SUBMISSION_FLUSH_MAX_ROWS``
+are waiting. Course certificates for the passes in a batch are issued in
+the same transaction as its rows.
+
+Every attempt is appended to an on-disk journal segment before it is
+acknowledged. Appends happen under the queue lock, but the fsync does not:
+one caller syncs everything appended so far while the others wait for it
+(group commit). A segment is deleted only after its rows and certificates
+are committed, and segments left behind by a crashed worker are replayed on
+the next start. Inserts ignore duplicate ids and certificates already issued
+are skipped, so replaying an already-committed segment is harmless.
+
+At most ``SUBMISSION_QUEUE_MAX_PENDING`` attempts wait in memory, and while
+flushes are failing (database unreachable) new submissions are refused with
+503 and ``Retry-After`` rather than piling up behind the outage.
+"""
+from fastapi import HTTPException, status
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+from datetime import datetime
+from pathlib import Path
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+
+from backend.core.config import settings
+from backend.core.db import SessionLocal, upsert
+from backend.models.exam import ExamAttempt
+from backend.services import certificate as certificate_service
+from backend.services import analytics, certificate_renderer, progress
+
+logger = logging.getLogger(__name__)
+
+_UUID_FIELDS = ("id", "candidate_id", "exam_id")
+
+
+def _encode(attempt: Dict) -> str:
+    record = dict(attempt)
+    for field in _UUID_FIELDS:
+        record[field] = str(record[field])
+    record["attempted_on"] = record["attempted_on"].isoformat()
+    return json.dumps(record, separators=(",", ":"))
+
+
+def _decode(line: str) -> Dict:
+    record = json.loads(line)
+    for field in _UUID_FIELDS:
+        record[field] = UUID(record[field])
+    record["attempted_on"] = datetime.fromisoformat(record["attempted_on"])
+    return record
+
+
+class SubmissionQueue:
+    def __init__(
+        self,
+        journal_dir: Path,
+        flush_interval_ms: int,
+        max_batch_rows: int,
+        fsync: bool,
+        max_pending: int,
+        retry_after: int
+    ):
+        self.journal_dir = journal_dir
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self.fsync = fsync
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+
+        self._cond = threading.Condition()
+        # Held by whoever is fsyncing the journal; taken before _cond, never after
+        self._sync_lock = threading.Lock()
+        # Lines appended to the journal so far, and how many of them are known durable
+        self._written = 0
+        self._synced = 0
+        self._pending: List[Dict] = []
+        # Rows taken off _pending by the flush in progress, still unwritten
+        self._in_flight = 0
+        self._database_available = True
+        self._oldest_enqueued: Optional[float] = None
+        self._segment = None
+        self._segment_path: Optional[Path] = None
+        self._segment_seq = 0
+        self._owner = uuid4().hex
+        self._owner_lock = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Metrics
+        self.enqueued = 0
+        self.flushed_rows = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.rejected = 0
+        self.journal_syncs = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.last_queue_wait_ms = 0.0
+        self.certificates_issued = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        # Held for the life of the process so other workers know our segments are live
+        self._owner_lock = open(self.journal_dir / f"owner-{self._owner}.lock", "w")
+        fcntl.flock(self._owner_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._recover_orphans()
+
+        with self._cond:
+            self._open_segment()
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="submission-write-behind", daemon=True)
+        self._thread.start()
+        logger.info(f"Submission write-behind queue started (journal {self.journal_dir})")
+
+    def stop(self) -> None:
+        """Flush everything still queued and stop the worker thread"""
+        if not self._running:
+            return
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
+        self._segment.close()
+        os.unlink(self._segment_path)
+        lock_path = Path(self._owner_lock.name)
+        self._owner_lock.close()
+        if any(self.journal_dir.glob(f"attempts-{self._owner}-*.journal")):
+            # A flush failed on the way down; the lock file is how the next
+            # start finds these segments, so leave it for recovery
+            logger.warning("Submission queue stopped with unflushed journal segments; they are replayed on the next start")
+        else:
+            lock_path.unlink(missing_ok=True)
+        logger.info("Submission write-behind queue stopped")
+
+    def _refuse(self, detail: str) -> HTTPException:
+        self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+    def enqueue(self, attempt: Dict) -> None:
+        """Durably queue an attempt row; returns once it is journaled"""
+        line = _encode(attempt) + "\n"
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("Submission queue is not running")
+            if not self._database_available:
+                raise self._refuse("Submissions are temporarily unavailable, please retry shortly")
+            if len(self._pending) + self._in_flight >= self.max_pending:
+                raise self._refuse("Too many submissions in progress, please retry shortly")
+            self._segment.write(line)
+            self._segment.flush()
+            self._written += 1
+            seq = self._written
+            self._pending.append(attempt)
+            if self._oldest_enqueued is None:
+                self._oldest_enqueued = time.monotonic()
+            self.enqueued += 1
+            if len(self._pending) >= self.max_batch_rows:
+                self._cond.notify()
+        if self.fsync:
+            self._sync(seq)
+
+    def _sync(self, seq: int) -> None:
+        """Return once journal line ``seq`` is on disk"""
+        with self._sync_lock:
+            if self._synced >= seq:
+                return  # covered by the fsync we queued behind
+            with self._cond:
+                target = self._written
+                # A private descriptor, so a rotation closing the segment cannot pull it away
+                fd = os.dup(self._segment.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._synced = target
+            self.journal_syncs += 1
+
+    def _open_segment(self) -> None:
+        self._segment_seq += 1
+        self._segment_path = self.journal_dir / f"attempts-{self._owner}-{self._segment_seq:08d}.journal"
+        self._segment = open(self._segment_path, "a")
+
+    def _rotate(self):
+        """Take the pending batch and its journal segment, leaving the segment durable"""
+        # Holding the sync lock, no caller can sync the new segment and mark
+        # lines of the old one durable before the old one is synced below
+        with self._sync_lock:
+            with self._cond:
+                batch, segment, segment_path = self._pending, self._segment, self._segment_path
+                oldest, written = self._oldest_enqueued, self._written
+                self._pending = []
+                self._in_flight = len(batch)
+                self._oldest_enqueued = None
+                self._open_segment()
+            if self.fsync and self._synced < written:
+                os.fsync(segment.fileno())
+                self._synced = written
+                self.journal_syncs += 1
+            segment.close()
+        return batch, segment_path, oldest
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._running and len(self._pending) < self.max_batch_rows:
+                    self._cond.wait(timeout=self.flush_interval)
+                if not self._pending:
+                    if not self._running:
+                        return
+                    continue
+            # Only this thread takes from _pending, so the batch is still there
+            self._flush(*self._rotate())
+
+    def _flush(self, batch: List[Dict], segment_path: Path, oldest: Optional[float]) -> None:
+        started = time.perf_counter()
+        delay = self.flush_interval
+        while True:
+            try:
+                certificate_ids = self._write_batch(batch)
+                break
+            except Exception:
+                self.flush_failures += 1
+                with self._cond:
+                    self._database_available = False
+                logger.exception(f"Failed to flush {len(batch)} queued exam attempts; retrying")
+                if not self._running:
+                    # Leave the segment on disk; stop() keeps our lock file so it
+                    # is replayed on the next start
+                    return
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+        segment_path.unlink(missing_ok=True)
+        self._issued(batch, certificate_ids)
+        with self._cond:
+            self._in_flight = 0
+            self._database_available = True
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.flushed_rows += len(batch)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+        if oldest is not None:
+            self.last_queue_wait_ms = (time.monotonic() - oldest) * 1000
+
+    def _write_batch(self, batch: List[Dict]) -> List[UUID]:
+        """Insert a batch and issue the certificates it earns in one transaction"""
+        db = SessionLocal()
+        try:
+            # Rows skipped as already written (journal replay) are not returned, so not counted twice
+            inserted = db.execute(
+                upsert(db, ExamAttempt).on_conflict_do_nothing(index_elements=["id"]).returning(
+                    ExamAttempt.candidate_id, ExamAttempt.exam_id, ExamAttempt.attempted_on,
+                    ExamAttempt.score_percentage, ExamAttempt.passed
+                ),
+                batch
+            ).all()
+            analytics.record_attempts(db, [row._mapping for row in inserted])
+            # All of the batch's passes, not just the inserted rows: on replay
+            # the attempts may be committed while their certificates are not
+            issued = certificate_service.evaluate_passed_exams(db, [
+                (attempt["candidate_id"], attempt["exam_id"]) for attempt in batch if attempt["passed"]
+            ])
+            certificate_ids = [certificate.id for certificate in issued]
+            db.commit()
+            return certificate_ids
+        finally:
+            db.close()
+
+    def _issued(self, batch: List[Dict], certificate_ids: List[UUID]) -> None:
+        """Follow-up for a committed batch: fresh progress and certificate PDFs"""
+        progress.invalidate_candidates(attempt["candidate_id"] for attempt in batch if attempt["passed"])
+        self.certificates_issued += len(certificate_ids)
+        certificate_renderer.enqueue(certificate_ids)
+
+    def _recover_orphans(self) -> None:
+        """Replay journal segments whose owning process is gone"""
+        owners = {path.stem[len("owner-"):] for path in self.journal_dir.glob("owner-*.lock")}
+        # Segments can also outlive their lock file (left by older versions)
+        owners.update(path.name.split("-")[1] for path in self.journal_dir.glob("attempts-*-*.journal"))
+        owners.discard(self._owner)
+
+        for owner in owners:
+            lock_path = self.journal_dir / f"owner-{owner}.lock"
+            with open(lock_path, "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # another live worker
+                if not self._replay(owner):
+                    continue  # keep the lock file so a later start retries
+            lock_path.unlink(missing_ok=True)
+
+    def _replay(self, owner: str) -> bool:
+        """Write one dead owner's segments; False if the database refused them"""
+        for segment_path in sorted(self.journal_dir.glob(f"attempts-{owner}-*.journal")):
+            with open(segment_path) as segment:
+                batch = [_decode(line) for line in segment if line.strip()]
+            logger.info(f"Replaying {len(batch)} journaled exam attempts from {segment_path.name}")
+            if batch:
+                try:
+                    certificate_ids = self._write_batch(batch)
+                except Exception:
+                    logger.exception(f"Replaying {segment_path.name} failed; it is retried on the next start")
+                    return False
+                self._issued(batch, certificate_ids)
+            segment_path.unlink()
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            queue_depth = len(self._pending) + self._in_flight
+            oldest = self._oldest_enqueued
+        return {
+            "enabled": self._running,
+            "queue_depth": queue_depth,
+            "oldest_pending_ms": (time.monotonic() - oldest) * 1000 if oldest is not None else 0.0,
+            "enqueued": self.enqueued,
+            "flushed_rows": self.flushed_rows,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "journal_syncs": self.journal_syncs,
+            "database_available": self._database_available,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+            "avg_flush_ms": (self.total_flush_ms / self.flushes) if self.flushes > 0 else 0.0,
+            "last_queue_wait_ms": self.last_queue_wait_ms,
+            "certificates_issued": self.certificates_issued,
+        }
+
+
+_queue = SubmissionQueue(
+    journal_dir=settings.SUBMISSION_JOURNAL_DIR,
+    flush_interval_ms=settings.SUBMISSION_FLUSH_INTERVAL_MS,
+    max_batch_rows=settings.SUBMISSION_FLUSH_MAX_ROWS,
+    fsync=settings.SUBMISSION_JOURNAL_FSYNC,
+    max_pending=settings.SUBMISSION_QUEUE_MAX_PENDING,
+    retry_after=settings.SUBMISSION_RETRY_AFTER_SECONDS,
+)
+
+
+def is_enabled() -> bool:
+    return _queue.running
+
+
+def start() -> None:
+    _queue.start()
+
+
+def stop() -> None:
+    _queue.stop()
+
+
+def enqueue(attempt: Dict) -> None:
+    _queue.enqueue(attempt)
+
+
+def stats() -> dict:
+    return _queue.stats()
@@ -1,17 +1,31 @@
 from fastapi import HTTPException, status, UploadFile
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from uuid import UUID
-import csv
+from sqlalchemy import func, insert, select, Select
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
 import io
+import logging
 
+from backend.core.config import settings
 from backend.models.user import User, Trainer, Candidate
 from backend.models.course import Subject, Course
 from backend.models.exam import Exam, ExamAttempt
-from backend.schemas.course import SubjectCreate, CourseInDB
-from backend.schemas.exam import ExamCreate
-from backend.utils.file_utils import save_exam_file
+from backend.schemas.course import SubjectCreate
+from backend.schemas.exam import (
+    ExamCreate, ExamResult, BulkExamSubmission,
+    BulkSubmissionItemResult, BulkSubmissionResult
+)
+from backend.services import certificate as certificate_service
+from backend.services import analytics, catalog, certificate_renderer, grading, item_analysis, progress, question_bank
+from backend.utils.exam_csv import iter_exam_rows
+from backend.utils.file_utils import FileTooLarge, HashingReader, atomic_write
+from backend.utils.pagination import InvalidCursor, keyset_page
+
+logger = logging.getLogger(__name__)
 
 def get_trainer_subjects(db: Session, trainer_id: UUID) -> List[Subject]:
     return db.query(Subject).filter(Subject.trainer_id == trainer_id).all()
@@ -22,9 +36,16 @@ def create_subject(db: Session, subject: SubjectCreate, trainer_id: UUID) -> Sub
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
     
-    db_subject = Subject(**subject.dict(), trainer_id=trainer_id)
+    db_subject = Subject(**subject.dict(), trainer_id=trainer_id, institute_id=trainer.institute_id)
     db.add(db_subject)
+    if db_subject.course_id:
+        # Keep the denormalized count used for certificate eligibility in step
+        db.query(Course).filter(Course.id == db_subject.course_id).update(
+            {Course.subject_count: Course.subject_count + 1}, synchronize_session=False
+        )
     db.commit()
+    catalog.bump_catalog_version()
+    progress.invalidate_all()
     db.refresh(db_subject)
     return db_subject
 
@@ -41,10 +62,12 @@ def create_exam(db: Session, exam: ExamCreate, trainer_id: UUID) -> Exam:
             detail="Subject not assigned to trainer"
         )
     
-    db_exam = Exam(**exam.dict())
+    db_exam = Exam(**exam.dict(), institute_id=subject.institute_id)
     db.add(db_exam)
     db.commit()
     db.refresh(db_exam)
+    if db_exam.institute_id:
+        catalog.invalidate_institute_exams(db_exam.institute_id)
     return db_exam
 
 def get_trainer_exams(db: Session, trainer_id: UUID) -> List[Exam]:
@@ -66,84 +89,209 @@ async def upload_exam_csv(db: Session, exam_id: UUID, file: UploadFile, trainer_
             detail="Exam not found or not assigned to trainer"
         )
     
-    # Read and validate CSV
-    content = await file.read()
-    try:
-        csv_data = io.StringIO(content.decode())
-        reader = csv.DictReader(csv_data)
-        
-        # Validate CSV structure
-        required_fields = ['question', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer']
-        if not all(field in reader.fieldnames for field in required_fields):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid CSV format. Required fields: question, option_a, option_b, option_c, option_d, correct_answer"
-            )
-        
-        # Save the file
-        file_path = save_exam_file(file, exam_id, trainer_id)
-        print(f"DEBUG: CSV saved to {file_path}")
-        
-        # Save content directly to ensure it's properly written
-        import os
-        from pathlib import Path
-        from backend.core.config import settings
-        
-        # Ensure the direct file path is also created
-        direct_file_path = settings.UPLOAD_BASE_DIR / file_path
-        os.makedirs(os.path.dirname(direct_file_path), exist_ok=True)
-        
-        # Reset file for reading
-        file.file.seek(0)
-        content = await file.read()
-        
-        # Write file directly
-        with open(direct_file_path, 'wb') as f:
-            f.write(content)
-        
-        print(f"DEBUG: Directly wrote file to {direct_file_path}")
-        print(f"DEBUG: File exists? {os.path.exists(direct_file_path)}")
-        
-        # Update exam with file path
-        exam.csv_url = file_path
-        db.commit()
-        
-        # Validate file can be read
-        try:
-            from backend.utils.file_utils import get_file_path
-            read_path = get_file_path(file_path)
-            with open(read_path, 'r') as f:
-                reader = csv.DictReader(f)
-                question_count = sum(1 for _ in reader)
-                print(f"DEBUG: Successfully read {question_count} questions from saved CSV")
-        except Exception as e:
-            print(f"DEBUG: Warning - Could not read saved CSV: {str(e)}")
-        
-        return {"message": "CSV uploaded successfully", "exam_id": str(exam_id), "file_path": file_path}
+    institute_id = exam.institute_id
     
+    try:
+        # Parsing, hashing and disk writes are blocking; keep them off the event loop
+        result = await run_in_threadpool(_ingest_exam_csv, db, exam, file, trainer_id)
+    except FileTooLarge as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     except Exception as e:
-        import traceback
-        print(f"DEBUG: Error uploading CSV: {str(e)}")
-        print(f"DEBUG: Traceback: {traceback.format_exc()}")
+        db.rollback()
+        logger.exception(f"Error uploading CSV for exam {exam_id}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error processing CSV: {str(e)}"
         )
+    
+    question_bank.invalidate_exam(exam_id)
+    if institute_id:
+        catalog.invalidate_institute_exams(institute_id)
+    return {"message": "CSV uploaded successfully", "exam_id": str(exam_id), **result}
 
-def get_institute_candidates(db: Session, trainer_id: UUID) -> List[User]:
-    # Get trainer's institute
+def _ingest_exam_csv(db: Session, exam: Exam, file: UploadFile, trainer_id: UUID) -> dict:
+    """
+    Ingest an uploaded exam CSV in a single streaming pass.
+
+    Each chunk is read once, hashed, size-checked, written to a temp file
+    and fed to the CSV parser, whose rows are validated and bulk-loaded into
+    exam_questions. The exam is committed before the temp file replaces the
+    stored CSV, so a failed commit leaves both the rows and the file as they
+    were.
+    """
+    dest_path = settings.EXAM_FILES_DIR / str(trainer_id) / str(exam.id) / Path(file.filename).name
+    file_path = str(dest_path.relative_to(settings.UPLOAD_BASE_DIR))
+    
+    with atomic_write(dest_path) as out:
+        reader = HashingReader(file.file, out, max_bytes=settings.EXAM_CSV_MAX_BYTES)
+        text = io.TextIOWrapper(
+            io.BufferedReader(reader, buffer_size=settings.UPLOAD_CHUNK_SIZE),
+            encoding="utf-8-sig",
+            newline=""
+        )
+        question_count = question_bank.store_exam_questions(
+            db, exam, iter_exam_rows(text, strict=True)
+        )
+        exam.csv_url = file_path
+        exam.csv_sha256 = reader.hexdigest()
+        db.commit()
+    
+    return {
+        "file_path": file_path,
+        "question_count": question_count,
+        "size_bytes": reader.size,
+        "sha256": reader.hexdigest()
+    }
+
+def submit_offline_exams(db: Session, bulk: BulkExamSubmission, trainer_id: UUID) -> BulkSubmissionResult:
+    """
+    Grade and record a batch of submissions collected offline at an exam centre.
+
+    Submissions are grouped by exam so each answer key is loaded and graded
+    once, attempts are written with one multi-row insert, and certificates
+    are evaluated once per (candidate, course) that gained a pass. Invalid
+    items are reported individually and do not fail the batch.
+    """
+    submissions = bulk.submissions
+    
     trainer = db.query(Trainer).filter(Trainer.user_id == trainer_id).first()
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
     
-    # Get all candidates in the institute
-    return db.query(User).join(Candidate).filter(
-        Candidate.institute_id == trainer.institute_id
-    ).all()
+    results: List[Optional[BulkSubmissionItemResult]] = [None] * len(submissions)
+    
+    def reject(index: int, error: str) -> None:
+        results[index] = BulkSubmissionItemResult(
+            index=index,
+            exam_id=submissions[index].exam_id,
+            candidate_id=submissions[index].candidate_id,
+            error=error
+        )
+    
+    # Candidates and exams must both belong to the trainer's institute
+    known_candidates = {
+        row.user_id for row in db.query(Candidate.user_id).filter(
+            Candidate.institute_id == trainer.institute_id,
+            Candidate.user_id.in_({s.candidate_id for s in submissions})
+        )
+    }
+    exams = {
+        exam.id: exam for exam in db.query(Exam).filter(
+            Exam.id.in_({s.exam_id for s in submissions}),
+            Exam.institute_id == trainer.institute_id
+        )
+    }
+    
+    by_exam = defaultdict(list)
+    for index, submission in enumerate(submissions):
+        if submission.candidate_id not in known_candidates:
+            reject(index, "Candidate not found in trainer's institute")
+        elif submission.exam_id not in exams:
+            reject(index, "Exam not found in trainer's institute")
+        else:
+            by_exam[submission.exam_id].append(index)
+    
+    received_on = datetime.utcnow()
+    attempts = []
+    for exam_id, indexes in by_exam.items():
+        exam = exams[exam_id]
+        try:
+            answer_key = question_bank.get_answer_key(db, exam)
+        except HTTPException as e:
+            for index in indexes:
+                reject(index, e.detail)
+            continue
+        
+        graded = grading.grade_batch(answer_key, [
+            grading.encode_submission(submissions[index].answers, len(answer_key))
+            for index in indexes
+        ])
+        for index, result in zip(indexes, graded):
+            submission = submissions[index]
+            attempted_on = _as_naive_utc(submission.attempted_on) or received_on
+            attempts.append({
+                "id": uuid4(),
+                "candidate_id": submission.candidate_id,
+                "exam_id": exam_id,
+                "score_percentage": result.score_percentage,
+                "passed": result.passed,
+                "answers": submission.answers,
+                "attempted_on": attempted_on
+            })
+            results[index] = BulkSubmissionItemResult(
+                index=index,
+                exam_id=exam_id,
+                candidate_id=submission.candidate_id,
+                result=ExamResult(
+                    exam_id=exam_id,
+                    score_percentage=result.score_percentage,
+                    passed=result.passed,
+                    total_questions=result.total,
+                    correct_answers=result.correct,
+                    attempted_on=attempted_on
+                )
+            )
+    
+    if attempts:
+        db.execute(insert(ExamAttempt), attempts)
+        analytics.record_attempts(db, attempts)
+        issued = certificate_service.evaluate_passed_exams(db, [
+            (attempt["candidate_id"], attempt["exam_id"]) for attempt in attempts if attempt["passed"]
+        ])
+        certificate_ids = [certificate.id for certificate in issued]
+        db.commit()
+        progress.invalidate_candidates(attempt["candidate_id"] for attempt in attempts if attempt["passed"])
+        certificate_renderer.enqueue(certificate_ids)
+    
+    return BulkSubmissionResult(
+        accepted=len(attempts),
+        rejected=len(submissions) - len(attempts),
+        results=results
+    )
+
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # exam_attempts.attempted_on is a naive UTC column
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def institute_candidates_query(db: Session, trainer_id: UUID) -> Select:
+    # Get trainer's institute
+    institute_id = db.query(Trainer.institute_id).filter(Trainer.user_id == trainer_id).scalar()
+    if not institute_id:
+        raise HTTPException(status_code=404, detail="Trainer not found")
+    
+    # Keyed on candidates.user_id so pages walk the (institute_id, user_id) index
+    return select(
+        Candidate.user_id.label("id"), User.email, User.full_name, User.role, User.created_at,
+        Candidate.is_ekyc_verified
+    ).join(User, User.id == Candidate.user_id).where(Candidate.institute_id == institute_id)
+
+def get_institute_candidates(
+    db: Session,
+    trainer_id: UUID,
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[List[Dict], Optional[str]]:
+    query = institute_candidates_query(db, trainer_id)
+    try:
+        return keyset_page(db, query, Candidate.user_id, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-def get_exam_results(db: Session, exam_id: UUID, trainer_id: UUID) -> dict:
+def get_exam_results(
+    db: Session,
+    exam_id: UUID,
+    trainer_id: UUID,
+    cursor: Optional[str] = None,
+    limit: int = settings.LIST_PAGE_SIZE
+) -> dict:
     # Verify exam belongs to trainer
-    exam = db.query(Exam).join(Subject).filter(
+    exam = db.query(Exam.id).join(Subject).filter(
         Exam.id == exam_id,
         Subject.trainer_id == trainer_id
     ).first()
@@ -154,39 +302,64 @@ def get_exam_results(db: Session, exam_id: UUID, trainer_id: UUID) -> dict:
             detail="Exam not found or not assigned to trainer"
         )
     
-    # Get exam attempts
-    attempts = db.query(ExamAttempt).filter(ExamAttempt.exam_id == exam_id).all()
+    # Maintained on every submission, so the summary never scans the attempts
+    stats = analytics.get_exam_stats(db, exam_id)
+    total_attempts = stats["attempts"]
+    passed_attempts = stats["passed_attempts"]
     
-    # Calculate statistics
-    total_attempts = len(attempts)
-    passed_attempts = sum(1 for attempt in attempts if attempt.passed)
-    average_score = sum(attempt.score_percentage for attempt in attempts) / total_attempts if total_attempts > 0 else 0
+    # One page of attempts, without the stored answers
+    query = select(
+        ExamAttempt.id,
+        ExamAttempt.candidate_id,
+        ExamAttempt.score_percentage.label("score"),
+        ExamAttempt.passed,
+        ExamAttempt.attempted_on
+    ).where(ExamAttempt.exam_id == exam_id)
+    try:
+        attempts, next_cursor = keyset_page(db, query, ExamAttempt.id, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "exam_id": str(exam_id),
         "total_attempts": total_attempts,
         "passed_attempts": passed_attempts,
         "pass_rate": (passed_attempts / total_attempts * 100) if total_attempts > 0 else 0,
-        "average_score": float(average_score),
+        "average_score": float(stats["score_sum"] / total_attempts) if total_attempts > 0 else 0.0,
+        "score_histogram": [
+            {
+                "min_score": bucket * 10,
+                "max_score": (bucket + 1) * 10,
+                "count": stats[f"score_bucket_{bucket}"]
+            }
+            for bucket in range(analytics.SCORE_BUCKETS)
+        ],
         "attempts": [
             {
-                "candidate_id": str(attempt.candidate_id),
-                "score": float(attempt.score_percentage),
-                "passed": attempt.passed,
-                "attempted_on": attempt.attempted_on
+                "candidate_id": str(attempt["candidate_id"]),
+                "score": float(attempt["score"]),
+                "passed": attempt["passed"],
+                "attempted_on": attempt["attempted_on"]
             }
             for attempt in attempts
-        ]
+        ],
+        "next_cursor": next_cursor
     }
 
-def get_trainer_courses(db: Session, trainer_id: UUID) -> List[CourseInDB]:
-    # Get trainer's institute
-    trainer = db.query(Trainer).filter(Trainer.user_id == trainer_id).first()
-    if not trainer:
-        raise HTTPException(status_code=404, detail="Trainer not found")
+def get_exam_item_analysis(db: Session, exam_id: UUID, trainer_id: UUID) -> dict:
+    exam = db.query(Exam).join(Subject).filter(
+        Exam.id == exam_id,
+        Subject.trainer_id == trainer_id
+    ).first()
     
-    # Get all courses (courses are global, not institute-specific in the current schema)
-    courses = db.query(Course).all()
+    if not exam:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Exam not found or not assigned to trainer"
+        )
     
-    # Return the courses in pydantic format
-    return [CourseInDB.from_orm(course) for course in courses] 
\ No newline at end of file
+    return item_analysis.get_item_analysis(db, exam)
+
+def get_trainer_courses(db: Session, version: str) -> bytes:
+    # Courses are global, not institute-specific in the current schema
+    return catalog.get_courses_json(db, version)
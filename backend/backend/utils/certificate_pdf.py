@@ -0,0 +1,119 @@
+"""
+Certificate PDF rendering.
+
+A template is a PDF page content stream with ``{{field}}`` placeholders
+inside string literals. It is parsed once into literal/placeholder segments,
+and the fixed objects around the page (catalog, page tree, fonts) are
+serialized once with their byte offsets, so rendering a certificate only
+joins the segments with the escaped field values, compresses the content
+stream and appends the xref table.
+
+Text uses the standard Helvetica fonts with WinAnsiEncoding; characters
+outside Latin-1 are rendered as ``?``.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import re
+import time
+import zlib
+
+from backend.utils.file_utils import atomic_write
+
+PAGE_WIDTH = 842  # A4 landscape, in points
+PAGE_HEIGHT = 595
+
+_PLACEHOLDER = re.compile(rb"\{\{(\w+)\}\}")
+
+DEFAULT_TEMPLATE = b"""\
+q 0.13 0.33 0.55 RG 6 w 24 24 794 547 re S 1 w 36 36 770 523 re S Q
+BT /F2 34 Tf 80 470 Td (Certificate of Completion) Tj ET
+BT /F1 16 Tf 80 420 Td (This is to certify that) Tj ET
+BT /F2 28 Tf 80 375 Td ({{candidate_name}}) Tj ET
+BT /F1 16 Tf 80 330 Td (has successfully completed the course) Tj ET
+BT /F2 22 Tf 80 290 Td ({{course_title}}) Tj ET
+BT /F1 14 Tf 80 240 Td (at {{institute_name}}) Tj ET
+BT /F1 12 Tf 80 110 Td (Issued on {{issued_on}}) Tj ET
+BT /F1 9 Tf 80 90 Td (Certificate ID: {{certificate_id}}) Tj ET
+"""
+
+_FIXED_OBJECTS = [
+    b"<< /Type /Catalog /Pages 2 0 R >>",
+    b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+    (
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+        b"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>"
+    ) % (PAGE_WIDTH, PAGE_HEIGHT),
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+]
+
+
+def escape_text(value: str) -> bytes:
+    """Encode a value for use inside a PDF string literal"""
+    return (
+        value.encode("latin-1", errors="replace")
+        .replace(b"\\", b"\\\\")
+        .replace(b"(", b"\\(")
+        .replace(b")", b"\\)")
+        .replace(b"\r", b" ")
+        .replace(b"\n", b" ")
+    )
+
+
+class CertificateTemplate:
+    def __init__(self, content: bytes):
+        # Even indexes are literal bytes, odd indexes are field names
+        self.segments: List[bytes] = _PLACEHOLDER.split(content)
+
+        self._head = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._offsets: List[int] = []
+        for number, body in enumerate(_FIXED_OBJECTS, start=1):
+            self._offsets.append(len(self._head))
+            self._head += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    def render(self, values: Dict[str, str]) -> bytes:
+        parts = list(self.segments)
+        for index in range(1, len(parts), 2):
+            parts[index] = escape_text(values.get(parts[index].decode(), ""))
+        stream = zlib.compress(b"".join(parts))
+
+        pdf = bytearray(self._head)
+        offsets = self._offsets + [len(pdf)]
+        pdf += b"6 0 obj\n<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream)
+        pdf += stream
+        pdf += b"\nendstream\nendobj\n"
+
+        xref = len(pdf)
+        pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+        for offset in offsets:
+            pdf += b"%010d 00000 n \n" % offset
+        pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n" % (len(offsets) + 1, xref)
+        return bytes(pdf)
+
+
+@lru_cache(maxsize=8)
+def _load_template(path: Optional[str], mtime_ns: int) -> CertificateTemplate:
+    if path is None:
+        return CertificateTemplate(DEFAULT_TEMPLATE)
+    return CertificateTemplate(Path(path).read_bytes())
+
+
+def load_template(path: Optional[Path] = None) -> CertificateTemplate:
+    """Parsed template for ``path`` (or the built-in layout), cached per process until the file changes"""
+    if path is None:
+        return _load_template(None, 0)
+    return _load_template(str(path), path.stat().st_mtime_ns)
+
+
+def render_certificate(template_path: Optional[Path], output_path: Path, values: Dict[str, str]) -> Tuple[int, float]:
+    """
+    Render one certificate and atomically write it to ``output_path``.
+
+    Runs inside the render worker processes; returns (bytes written, render ms).
+    """
+    started = time.perf_counter()
+    pdf = load_template(template_path).render(values)
+    with atomic_write(output_path) as f:
+        f.write(pdf)
+    return len(pdf), (time.perf_counter() - started) * 1000
@@ -0,0 +1,32 @@
+"""
+Parsing of uploaded exam question CSVs.
+
+Rows are read one at a time, so an upload can be validated and loaded into
+exam_questions in the same pass that streams it to disk.
+"""
+from typing import Dict, Iterator, TextIO, Tuple
+import csv
+
+QUESTION_FIELDS = ['question', 'option_a', 'option_b', 'option_c', 'option_d']
+REQUIRED_FIELDS = QUESTION_FIELDS + ['correct_answer']
+VALID_ANSWERS = ('a', 'b', 'c', 'd')
+
+
+def iter_exam_rows(f: TextIO, strict: bool = False) -> Iterator[Tuple[Dict[str, str], str]]:
+    """
+    Yield ``(question, correct_answer)`` pairs, skipping rows without a question or answer.
+
+    With ``strict``, a missing header column or an answer other than a-d
+    raises ``ValueError`` as soon as it is read.
+    """
+    reader = csv.DictReader(f)
+    if strict and not all(field in (reader.fieldnames or []) for field in REQUIRED_FIELDS):
+        raise ValueError(f"Invalid CSV format. Required fields: {', '.join(REQUIRED_FIELDS)}")
+    for row in reader:
+        if not row.get('question') or not row.get('correct_answer'):
+            continue
+        correct_answer = row['correct_answer'].strip().lower()
+        if strict and correct_answer not in VALID_ANSWERS:
+            raise ValueError(f"Line {reader.line_num}: correct_answer must be one of a, b, c, d")
+        # Anything that is not a single option letter can never match
+        yield {field: row[field] or "" for field in QUESTION_FIELDS}, correct_answer if len(correct_answer) == 1 and correct_answer.isascii() else "?"
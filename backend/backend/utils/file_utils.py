@@ -1,8 +1,12 @@
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Iterator, Optional
+from contextlib import contextmanager
 from fastapi import UploadFile
+import hashlib
+import io
 import shutil
 import os
+import tempfile
 from uuid import UUID
 
 from backend.core.config import settings
@@ -17,10 +21,7 @@ def get_file_path(relative_path: str) -> Path:
     Returns:
         Path: Full path to the file
     """
-    full_path = settings.UPLOAD_BASE_DIR / relative_path
-    print(f"DEBUG get_file_path: relative_path={relative_path}, UPLOAD_BASE_DIR={settings.UPLOAD_BASE_DIR}, full_path={full_path}")
-    print(f"DEBUG get_file_path: Does file exist? {full_path.exists()}")
-    return full_path
+    return settings.UPLOAD_BASE_DIR / relative_path
 
 def save_uploaded_file(
     file: UploadFile,
@@ -103,4 +104,55 @@ def delete_file(file_path: str) -> bool:
         full_path.unlink()
         return True
     except FileNotFoundError:
-        return False 
\ No newline at end of file
+        return False
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "wb") -> Iterator[BinaryIO]:
+    """
+    Write a file atomically.
+
+    Data goes to a temporary file in the destination directory, which is
+    renamed over ``path`` only if the block completes without raising.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+class FileTooLarge(Exception):
+    pass
+
+class HashingReader(io.RawIOBase):
+    """
+    Raw reader that copies everything it reads from ``source`` into ``sink``,
+    hashing and counting the bytes as they pass and enforcing a size cap.
+    """
+
+    def __init__(self, source: BinaryIO, sink: BinaryIO, max_bytes: Optional[int] = None):
+        self.source = source
+        self.sink = sink
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self.source.read(len(buffer))
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise FileTooLarge(f"File exceeds the {self.max_bytes} byte limit")
+        self._sha256.update(chunk)
+        self.sink.write(chunk)
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
@@ -0,0 +1,43 @@
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import base64
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(key: UUID) -> str:
+    """Opaque, URL-safe cursor for the row keyed by ``key``"""
+    return base64.urlsafe_b64encode(key.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> UUID:
+    try:
+        return UUID(bytes=base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise InvalidCursor("Invalid cursor")
+
+
+def keyset_page(
+    db: Session,
+    query: Select,
+    key_column,
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[List[Dict], Optional[str]]:
+    """One page of ``query`` ordered by the unique ``key_column``, resuming after ``cursor``.
+
+    ``key_column`` must be the first column ``query`` selects. Seeks straight
+    to the cursor through the key's index instead of counting past an OFFSET,
+    so every page costs the same however deep it is. Returns the rows and the
+    cursor of the next page (None on the last page).
+    """
+    if cursor is not None:
+        query = query.where(key_column > decode_cursor(cursor))
+    # One extra row tells whether another page follows
+    rows = db.execute(query.order_by(key_column).limit(limit + 1)).all()
+    next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+    return [row._asdict() for row in rows[:limit]], next_cursor
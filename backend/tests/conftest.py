@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+import pytest
+
+# Must be set before backend.core.config is first imported
+os.environ.setdefault(
+    "SQLALCHEMY_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+
+
+@pytest.fixture
+def db():
+    """A session on a freshly created schema"""
+    from backend.core.db import Base, SessionLocal, engine
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with SessionLocal() as session:
+        yield session
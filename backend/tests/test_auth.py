@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from datetime import datetime, timedelta, timezone
+
+from backend.core.config import settings
+from backend.core.security import get_password_hash
+from backend.main import app
+from backend.models.institute import Institute
+from backend.models.user import Candidate, RefreshToken, User
+from backend.services import auth
+
+PASSWORD = "correct horse"
+
+
+@pytest.fixture
+def client(db):
+    institute = Institute(name="I", district="D", block="B")
+    db.add(institute)
+    db.flush()
+    user = User(
+        email="candidate@example.com", hashed_password=get_password_hash(PASSWORD),
+        role="candidate", aadhaar_id="000000000001", full_name="Candidate"
+    )
+    db.add(user)
+    db.flush()
+    db.add(Candidate(user_id=user.id, institute_id=institute.id))
+    db.commit()
+    # No lifespan: bcrypt runs in the threadpool and no background pools start
+    return TestClient(app)
+
+
+def _login(client) -> dict:
+    response = client.post(
+        "/api/v1/auth/login", data={"username": "candidate@example.com", "password": PASSWORD}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _attempts(client, access_token: str) -> int:
+    return client.get(
+        "/api/v1/candidate/attempts", headers={"Authorization": f"Bearer {access_token}"}
+    ).status_code
+
+
+def test_logout_rejects_the_old_access_token(client):
+    tokens = _login(client)
+    assert _attempts(client, tokens["access_token"]) == 200
+
+    response = client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 204
+    assert _attempts(client, tokens["access_token"]) == 401
+
+    # Signing in again right away works
+    assert _attempts(client, _login(client)["access_token"]) == 200
+
+
+def test_refresh_token_reuse_rejects_access_tokens(client, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_REUSE_GRACE_SECONDS", 0)
+    tokens = _login(client)
+    rotated = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert rotated.status_code == 200
+
+    replayed = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replayed.status_code == 401
+    assert _attempts(client, rotated.json()["access_token"]) == 401
+    successor = client.post("/api/v1/auth/refresh", json={"refresh_token": rotated.json()["refresh_token"]})
+    assert successor.status_code == 401
+
+
+def test_racing_refreshes_within_the_grace_window_both_succeed(client):
+    tokens = _login(client)
+    first = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    second = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert (first.status_code, second.status_code) == (200, 200)
+
+    # Neither was taken for theft: both successors and their access tokens work
+    assert _attempts(client, first.json()["access_token"]) == 200
+    assert _attempts(client, second.json()["access_token"]) == 200
+    for refreshed in (first, second):
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": refreshed.json()["refresh_token"]})
+        assert response.status_code == 200
+
+
+def test_no_grace_after_logout(client):
+    tokens = _login(client)
+    rotated = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    client.post("/api/v1/auth/logout", json={"refresh_token": rotated.json()["refresh_token"]})
+    replayed = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replayed.status_code == 401
+
+
+def test_purge_deletes_only_expired_tokens(client, db):
+    _login(client)
+    _login(client)
+    db.query(RefreshToken).filter(RefreshToken.id == db.query(RefreshToken.id).limit(1).scalar_subquery()).update(
+        {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}, synchronize_session=False
+    )
+    db.commit()
+    assert auth.purge_expired_refresh_tokens(db, batch_size=1) == 1
+    assert db.query(RefreshToken).count() == 1
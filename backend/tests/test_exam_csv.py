@@ -0,0 +1,34 @@
+import io
+
+import pytest
+
+from backend.utils.exam_csv import iter_exam_rows
+
+CSV = (
+    "question,option_a,option_b,option_c,option_d,correct_answer\n"
+    "What is 1 + 1?,1,2,3,4, B \n"
+    "Pick the vowel,x,y,z,e,d\n"
+    ",skipped,for,no,question,a\n"
+    "Unicode — ok?,ä,ö,ü,ß,A\n"
+)
+
+
+def test_iter_exam_rows_normalizes_answers_and_skips_blank_questions():
+    rows = list(iter_exam_rows(io.StringIO(CSV)))
+    assert [answer for _, answer in rows] == ["b", "d", "a"]
+    assert rows[0][0] == {
+        "question": "What is 1 + 1?", "option_a": "1", "option_b": "2", "option_c": "3", "option_d": "4"
+    }
+    assert rows[2][0]["option_d"] == "ß"
+
+
+def test_iter_exam_rows_marks_unusable_answers():
+    csv = "question,option_a,option_b,option_c,option_d,correct_answer\nQ,a,b,c,d,ab\n"
+    assert [answer for _, answer in iter_exam_rows(io.StringIO(csv))] == ["?"]
+
+
+def test_iter_exam_rows_strict_rejects_bad_answers_and_headers():
+    with pytest.raises(ValueError, match="Line 2"):
+        list(iter_exam_rows(io.StringIO("question,option_a,option_b,option_c,option_d,correct_answer\nQ,a,b,c,d,e\n"), strict=True))
+    with pytest.raises(ValueError, match="Required fields"):
+        list(iter_exam_rows(io.StringIO("question,correct_answer\nQ,a\n"), strict=True))
@@ -0,0 +1,55 @@
+import hashlib
+import io
+
+import pytest
+
+from backend.utils.file_utils import FileTooLarge, HashingReader, atomic_write
+
+
+def _drain(reader: HashingReader, chunk_size: int = 4) -> None:
+    buffered = io.BufferedReader(reader, buffer_size=chunk_size)
+    while buffered.read(chunk_size):
+        pass
+
+
+def test_hashing_reader_copies_hashes_and_counts():
+    data = b"question,answer\n" * 10
+    sink = io.BytesIO()
+    reader = HashingReader(io.BytesIO(data), sink, max_bytes=len(data))
+    _drain(reader)
+    assert sink.getvalue() == data
+    assert reader.size == len(data)
+    assert reader.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+def test_hashing_reader_stops_past_the_cap():
+    sink = io.BytesIO()
+    reader = HashingReader(io.BytesIO(b"x" * 100), sink, max_bytes=10)
+    with pytest.raises(FileTooLarge):
+        _drain(reader)
+    # Nothing past the chunk that crossed the limit is read
+    assert reader.size <= 10 + 4
+
+
+def test_atomic_write_replaces_only_on_success(tmp_path):
+    path = tmp_path / "exams" / "exam.csv"
+    with atomic_write(path) as f:
+        f.write(b"first")
+    assert path.read_bytes() == b"first"
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write(b"partial")
+            raise RuntimeError("upload aborted")
+    assert path.read_bytes() == b"first"
+    assert [p.name for p in path.parent.iterdir()] == ["exam.csv"]
+
+
+def test_oversized_upload_leaves_the_stored_file_alone(tmp_path):
+    path = tmp_path / "exam.csv"
+    path.write_bytes(b"original")
+    with pytest.raises(FileTooLarge):
+        with atomic_write(path) as out:
+            _drain(HashingReader(io.BytesIO(b"y" * 1000), out, max_bytes=100), chunk_size=64)
+    assert path.read_bytes() == b"original"
+    assert [p.name for p in tmp_path.iterdir()] == ["exam.csv"]
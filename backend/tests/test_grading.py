@@ -0,0 +1,61 @@
+import pytest
+
+from backend.services.grading import PASS_THRESHOLD, encode_submission, grade, grade_batch
+
+
+def test_encode_submission_places_answers_by_question_index():
+    assert encode_submission({"0": "a", "2": "d"}, 4) == b"a\0d\0"
+
+
+def test_encode_submission_normalizes_case_and_whitespace():
+    assert encode_submission({"0": " B ", "1": "C"}, 2) == b"bc"
+
+
+@pytest.mark.parametrize("answers", [
+    {"4": "a"},      # out of range
+    {"-1": "a"},     # not a plain index
+    {"01": "a"},     # not canonical
+    {"x": "a"},
+    {"0": "e"},      # not an option letter
+    {"0": "ab"},
+    {"0": ""},
+])
+def test_encode_submission_leaves_invalid_entries_unanswered(answers):
+    assert encode_submission(answers, 4) == b"\0\0\0\0"
+
+
+def test_grade_scores_matching_positions():
+    result = grade(b"abcd", b"abdd")
+    assert result.mask == b"\1\1\0\1"
+    assert (result.correct, result.total) == (3, 4)
+    assert result.score_percentage == 75.0
+    assert result.passed
+
+
+def test_unanswered_and_unmatchable_key_never_score():
+    # "?" marks a malformed key entry; nothing a submission encodes matches it
+    result = grade(b"a?c", encode_submission({"1": "b"}, 3))
+    assert result.correct == 0
+    assert not result.passed
+
+
+def test_pass_threshold_is_inclusive():
+    key = b"abcdabcdab"
+    needed = int(PASS_THRESHOLD / 10)  # questions to answer correctly out of 10
+    assert grade(key, key[:needed] + b"\0" * (10 - needed)).passed
+    assert not grade(key, key[:needed - 1] + b"\0" * (11 - needed)).passed
+
+
+def test_grade_batch_grades_each_submission_independently():
+    key = b"abcd"
+    results = grade_batch(key, [b"abcd", b"\0\0\0\0", b"dcba", b"abc\0"])
+    assert [r.correct for r in results] == [4, 0, 0, 3]
+    assert [r.mask for r in results][3] == b"\1\1\1\0"
+
+
+def test_grade_batch_edge_cases():
+    assert grade_batch(b"abc", []) == []
+    empty = grade_batch(b"", [b"", b""])
+    assert [(r.total, r.score_percentage, r.passed) for r in empty] == [(0, 0.0, False)] * 2
+    with pytest.raises(ValueError):
+        grade_batch(b"abc", [b"ab"])
@@ -0,0 +1,63 @@
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, Uuid, create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from backend.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+
+metadata = MetaData()
+items = Table("items", metadata, Column("id", Uuid, primary_key=True), Column("n", Integer))
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_cursor_round_trip():
+    key = uuid4()
+    cursor = encode_cursor(key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize("cursor", ["", "abc", "!!!!", encode_cursor(uuid4()) + "AAAA"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_keyset_pages_cover_every_row_once_in_key_order(db):
+    ids = [uuid4() for _ in range(25)]
+    db.execute(insert(items), [{"id": key, "n": i} for i, key in enumerate(ids)])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = keyset_page(db, select(items.c.id, items.c.n), items.c.id, cursor, 10)
+        seen.extend(row["id"] for row in rows)
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 3
+    assert seen == sorted(ids)
+
+
+def test_keyset_page_exact_fit_has_no_next_page(db):
+    db.execute(insert(items), [{"id": uuid4(), "n": i} for i in range(10)])
+    rows, cursor = keyset_page(db, select(items.c.id), items.c.id, None, 10)
+    assert len(rows) == 10
+    assert cursor is None
+
+
+def test_keyset_page_resumes_after_rows_added_before_the_cursor(db):
+    db.execute(insert(items), [{"id": uuid4(), "n": i} for i in range(6)])
+    first, cursor = keyset_page(db, select(items.c.id), items.c.id, None, 3)
+    # A row inserted behind the cursor must not shift the next page
+    db.execute(insert(items), [{"id": UUID(int=0), "n": -1}])
+    second, _ = keyset_page(db, select(items.c.id), items.c.id, cursor, 3)
+    assert {row["id"] for row in first}.isdisjoint(row["id"] for row in second)
+    assert len(second) == 3
@@ -0,0 +1,76 @@
+import gzip
+import io
+import json
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from backend.core.config import settings
+from backend.models.exam import Exam
+from backend.services import question_bank
+from backend.utils.exam_csv import iter_exam_rows
+
+CSV = "question,option_a,option_b,option_c,option_d,correct_answer\n" + "".join(
+    f"Q{i},a{i},b{i},c{i},d{i},{'abcd'[i % 4]}\n" for i in range(25)
+)
+
+
+def _exam(db, csv_url="exam.csv") -> Exam:
+    # Foreign keys are not enforced on SQLite, so no subject is needed
+    exam = Exam(subject_id=uuid4(), title="E", csv_url=csv_url)
+    db.add(exam)
+    db.flush()
+    return exam
+
+
+def test_questions_round_trip_through_exam_questions(db):
+    exam = _exam(db)
+    assert question_bank.store_exam_questions(db, exam, iter_exam_rows(io.StringIO(CSV))) == 25
+    db.commit()
+
+    assert question_bank.get_question_count(db, exam) == 25
+    page = question_bank.get_question_page(db, exam, 10, 20)
+    assert [q["question"] for q in page] == [f"Q{i}" for i in range(10, 20)]
+    assert "correct_answer" not in page[0]
+    assert question_bank.get_question_page(db, exam, 25, 35) == []
+    assert question_bank.get_answer_key(db, exam) == ("abcd" * 7)[:25].encode()
+
+    bundle = json.loads(gzip.decompress(question_bank.get_exam_bundle(db, exam)))
+    assert bundle["total"] == 25
+    assert bundle["questions"] == question_bank.get_question_page(db, exam, 0, 25)
+    assert json.loads(question_bank.get_exam_bundle(db, exam, gzipped=False)) == bundle
+
+
+def test_reupload_replaces_questions(db):
+    exam = _exam(db)
+    question_bank.store_exam_questions(db, exam, iter_exam_rows(io.StringIO(CSV)))
+    db.commit()
+    question_bank.invalidate_exam(exam.id)
+    question_bank.store_exam_questions(db, exam, iter_exam_rows(io.StringIO(CSV.split("Q3,")[0])))
+    db.commit()
+    assert question_bank.get_question_count(db, exam) == 3
+    assert question_bank.get_answer_key(db, exam) == b"abc"
+
+
+def test_exam_uploaded_before_the_table_is_ingested_on_first_use(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_BASE_DIR", tmp_path)
+    (tmp_path / "legacy.csv").write_text(CSV)
+    exam = _exam(db, "legacy.csv")
+    db.commit()
+    assert exam.question_count is None
+
+    assert question_bank.get_answer_key(db, exam) == ("abcd" * 7)[:25].encode()
+    assert exam.question_count == 25
+    assert not db.dirty
+    db.expire_all()
+    assert db.get(Exam, exam.id).question_count == 25
+
+
+def test_missing_csv_of_a_legacy_exam_is_not_found(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_BASE_DIR", tmp_path)
+    exam = _exam(db, "missing.csv")
+    db.commit()
+    with pytest.raises(HTTPException) as e:
+        question_bank.get_question_page(db, exam, 0, 10)
+    assert e.value.status_code == 404
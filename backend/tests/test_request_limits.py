@@ -0,0 +1,39 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.utils.request_limits import BodySizeLimitMiddleware
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+
+    @app.post("/limited")
+    async def limited(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/open")
+    async def open_(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/limited": 100})
+    return TestClient(app)
+
+
+def test_declared_length_over_the_limit_is_refused():
+    response = _client().post("/limited", content=b"x" * 101)
+    assert response.status_code == 413
+
+
+def test_streamed_body_is_cut_off_past_the_limit():
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 30
+
+    response = _client().post("/limited", content=chunks())
+    assert response.status_code == 413
+
+
+def test_bodies_within_the_limit_and_other_paths_pass():
+    client = _client()
+    assert client.post("/limited", content=b"x" * 100).json() == {"size": 100}
+    assert client.post("/open", content=b"x" * 1000).json() == {"size": 1000}